@@ -6,14 +6,15 @@ operations.'''
 from fastapi import APIRouter, Depends, HTTPException,Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from datetime import datetime,timezone
 from app.db.session import SessionLocal
 from app.schemas.user import UserCreate, UserLogin
 from app.services.user import UserService
 from app.utils.decorators import admin_required,login_required
 from app.core.logger import *
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models.user import Movies
+from app.core.rate_limit import enforce_auth_rate_limit
+from app.db.executor import run_db
 
 router = APIRouter(prefix="/auth")
 security = HTTPBearer()
@@ -21,61 +22,48 @@ security = HTTPBearer()
 
 # ----------------- Register -----------------
 @router.post("/register")
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, request: Request, db: Session = Depends(get_db)):
     '''Register a new user in the system.'''
+    await enforce_auth_rate_limit(request, "register", user.email)
     service = UserService(db)
-    created_user = service.create_user(user.username, user.email, user.role, user.password)
-    logger.info(
-        {
-        "event": "User Registered",
-        "username": user.username,
-        "email": user.email,
-        "role": user.role,
-        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-        }
+    created_user = await service.create_user(user.username, user.email, user.role, user.password)
+    events.info(
+        "User Registered",
+        username=user.username,
+        email=user.email,
+        role=user.role,
     )
     return created_user
 
 # ------------------------- Login ---------------------------
 @router.post("/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
+async def login(user: UserLogin, request: Request, db: Session = Depends(get_db)):
     '''Authenticate a user and generate a JWT access token.'''
+    await enforce_auth_rate_limit(request, "login", user.email)
     service = UserService(db)
-    logger.info(
-        {
-            "event": "User Logged In",
-            "email": user.email,
-            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-        }
-    )
-    return service.login_service(user.email, user.password)
+    events.info("User Logged In", email=user.email)
+    return await service.login_service(user.email, user.password)
 
 
 #-------------------authentication(for me)----------------
 @router.get("/me",dependencies=[Depends(security)])
 @login_required
-async def me(request: Request,db: Session = Depends(get_db)):
+async def me(request: Request,db: Session = Depends(get_read_db)):
     '''Retrieve details of the currently authenticated user.'''
     user=request.state.user
     if not user:
-        logger.warning(
-            {
-                "event": "User Retrieval Failed",
-                "reason": "Authenticated user not found in request state",
-                "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"),
-            }
+        events.warning(
+            "User Retrieval Failed",
+            reason="Authenticated user not found in request state",
         )
         raise HTTPException(status_code=404, detail="User not found")
 
-    logger.info(
-        {
-            "event": "User Profile Retrieved",
-            "username": user.username,
-            "email": user.email,
-            "role": user.role,
-            "status": user.status,
-            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-        }
+    events.info(
+        "User Profile Retrieved",
+        username=user.username,
+        email=user.email,
+        role=user.role,
+        status=user.status,
     )
 
     return [
@@ -93,17 +81,14 @@ async def me(request: Request,db: Session = Depends(get_db)):
 #-------------------authentication(only for admins)----------------
 @router.get("/admins",summary="get all users (admin only)",dependencies=[Depends(security)])
 @admin_required
-async def get_all_users(request: Request,db: Session = Depends(get_db)):
+async def get_all_users(request: Request,db: Session = Depends(get_read_db)):
     '''Retrieve a list of all registered users. Accessible only by admin users.'''
     service=UserService(db)
-    users=service.list_users()
-    logger.info(
-        {
-            "event": "Admin Access - User List Retrieved",
-            "admin_user": getattr(request.state, "user", None),
-            "total_users": len(users),
-            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-        }
+    users=await run_db(service.list_users)
+    events.info(
+        "Admin Access - User List Retrieved",
+        admin_user=request.state.user.username,
+        total_users=len(users),
     )
     return [
         {"id":u.id,
@@ -123,7 +108,7 @@ async def get_all_users(request: Request,db: Session = Depends(get_db)):
 async def update_users(user_id: int, request: Request, user: UserCreate, db: Session = Depends(get_db)):
     '''Update user details (admin only).'''
     service = UserService(db)
-    return service.update_user(user_id, user)
+    return await service.update_user(user_id, user)
 
 #-----------------delete user--------------------------
 
@@ -132,27 +117,21 @@ async def update_users(user_id: int, request: Request, user: UserCreate, db: Ses
 async def delete_users(user_id : int, request:Request, db: Session = Depends(get_db)):
     '''Delete a user by ID (admin only).'''
     service=UserService(db)
-    deleted=service.delete_user_service(user_id)
+    deleted=await run_db(service.delete_user_service, user_id)
     if not deleted:
-        logger.warning(
-            {
-                "event": "User Deletion Failed",
-                "admin_user": getattr(request.state, "user", None),
-                "user_id": user_id,
-                "reason": "User not found",
-                "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-            }
+        events.warning(
+            "User Deletion Failed",
+            admin_user=request.state.user.username,
+            user_id=user_id,
+            reason="User not found",
         )
         raise HTTPException(status_code=404, detail="User not found")
 
-    logger.info(
-        {
-            "event": "User Deleted Successfully",
-            "admin_user": getattr(request.state, "user", None),
-            "deleted_user": deleted.username,
-            "deleted_user_id": deleted.id,
-            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-        }
+    events.info(
+        "User Deleted Successfully",
+        admin_user=request.state.user.username,
+        deleted_user=deleted.username,
+        deleted_user_id=deleted.id,
     )
     return {"message":f"user '{deleted.username}' deleted successfully"}
      
@@ -168,5 +147,5 @@ async def logout(request: Request,credentials: HTTPAuthorizationCredentials = De
     #credentials.schema will be bearer and creadentials.credentials will be the token if authorization header is present 
     service = UserService(db)
     user_info = getattr(request.state, "user", None)
-    return service.logout_service(token, user_info)
+    return await run_db(service.logout_service, token, user_info)
 
@@ -0,0 +1,33 @@
+'''This module defines admin-only diagnostics endpoints for inspecting the
+runtime state of a worker, such as its database connection pool.'''
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.security import HTTPBearer
+from app.db.session import get_engine
+from app.db.pool import pool_stats, pool_settings
+from app.db.replicas import replica_set
+from app.utils.decorators import admin_required
+
+router = APIRouter(prefix="/diagnostics")
+security = HTTPBearer()
+
+
+#-------------------connection pool health (only for admins)----------------
+@router.get("/db", summary="connection pool health (admin only)", dependencies=[Depends(security)])
+@admin_required
+async def db_diagnostics(request: Request):
+    '''Report the primary pool's settings, its current occupancy, the checkout
+    counters and wait times recorded by this worker since it started, and the
+    health and pool stats of each replica.'''
+    pool = get_engine().pool
+    current = {}
+    for name in ("size", "checkedout", "checkedin", "overflow"):
+        if hasattr(pool, name):
+            current[name] = getattr(pool, name)()
+    return {
+        "pool_class": type(pool).__name__,
+        "settings": pool_settings(),
+        "current": current,
+        "stats": pool_stats.snapshot(),
+        "replicas": replica_set.status(),
+    }
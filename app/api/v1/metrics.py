@@ -0,0 +1,74 @@
+'''This module exposes application metrics at `/metrics` in the Prometheus text
+exposition format, and registers the collectors for DB pool, auth cache,
+watchlist cache and password-hashing statistics.'''
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import metrics, collect_samples, render_text
+from app.core.user_cache import user_cache
+from app.core.watchlist_cache import watchlist_cache
+from app.core.security import jwt_cache
+from app.core.revocation import revocation_list
+from app.core.hashing import queue_depth
+from app.db.session import get_engine
+from app.db.pool import pool_stats
+from app.db.replicas import replica_set
+
+router = APIRouter()
+
+
+def _pool_stats():
+    '''Connection pool gauges and counters for the primary and each replica engine.'''
+    engines = [("primary", get_engine(), pool_stats)] + replica_set.pools()
+    stats = (
+        ("db_pool_size", "size", "Configured size of the DB connection pool."),
+        ("db_pool_checked_out", "checkedout", "DB connections currently checked out."),
+        ("db_pool_checked_in", "checkedin", "Idle DB connections in the pool."),
+        ("db_pool_overflow", "overflow", "DB connections open beyond the pool size."),
+    )
+    for engine_name, engine, engine_stats in engines:
+        labels = {"engine": engine_name}
+        pool = engine.pool
+        for name, method, help_text in stats:
+            if hasattr(pool, method):
+                yield name, "gauge", help_text, labels, getattr(pool, method)()
+        counters = engine_stats.snapshot()
+        yield "db_pool_checkout_wait_seconds_total", "counter", "Time spent waiting for a DB connection.", labels, counters["wait_seconds_total"]
+        yield "db_pool_checkouts_total", "counter", "DB connection checkouts.", labels, counters["checkouts"]
+        yield "db_pool_timeouts_total", "counter", "DB connection checkouts that timed out.", labels, counters["timeouts"]
+        yield "db_pool_invalidations_total", "counter", "DB connections invalidated (e.g. by pre-ping).", labels, counters["invalidations"]
+
+
+def _auth_stats():
+    '''Hit/miss counters and sizes of the auth caches and the revocation list.'''
+    for cache_name, cache in (("user", user_cache), ("jwt", jwt_cache)):
+        stats = cache.stats()
+        labels = {"cache": cache_name}
+        yield "auth_cache_hits_total", "counter", "Auth cache hits.", labels, stats["hits"]
+        yield "auth_cache_misses_total", "counter", "Auth cache misses.", labels, stats["misses"]
+        yield "auth_cache_size", "gauge", "Entries held in the auth cache.", labels, stats["size"]
+    yield "auth_revoked_tokens", "gauge", "Revoked, unexpired tokens known to the worker.", {}, len(revocation_list)
+
+
+def _watchlist_cache_stats():
+    stats = watchlist_cache.stats()
+    yield "watchlist_cache_hits_total", "counter", "Watchlist cache hits.", {}, stats["hits"]
+    yield "watchlist_cache_misses_total", "counter", "Watchlist cache misses.", {}, stats["misses"]
+    yield "watchlist_cache_size", "gauge", "Users whose watchlist is cached.", {}, stats["size"]
+    yield "watchlist_cache_entries", "gauge", "Movies held in cached watchlists.", {}, stats["entries"]
+
+
+def _hashing_stats():
+    yield "password_hash_queue_depth", "gauge", "Password hashing operations queued or running.", {}, queue_depth()
+
+
+metrics.register_collector(_pool_stats)
+metrics.register_collector(_auth_stats)
+metrics.register_collector(_watchlist_cache_stats)
+metrics.register_collector(_hashing_stats)
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    '''Return all metrics in the Prometheus text exposition format.'''
+    return PlainTextResponse(render_text(collect_samples()), media_type="text/plain; version=0.0.4")
@@ -5,19 +5,46 @@ Each operation is authenticated using JWT tokens and protected by the `login_req
 decorator. The routes rely on the `WatchlistService` for all underlying database and
 business logic operations.'''
 
-from fastapi import APIRouter, Depends,Request,Query
+from fastapi import APIRouter, Depends,Request,Query,Response
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.db.session import get_db
-from app.schemas.watchlist import WatchlistCreate, WatchlistUpdate, WatchlistOut
+from app.db.session import get_db, get_read_db
+from app.schemas.watchlist import (
+    WatchlistCreate, WatchlistBulkCreate, WatchlistBulkOut, WatchlistCheckRequest, WatchlistCheckItem,
+    WatchlistUpdate, WatchlistOut
+)
 from app.services.watchlist import WatchlistService
+from app.db.executor import run_db
 from app.utils.decorators import login_required 
 from app.core import logger  
 
 router = APIRouter(prefix="/watchlist")
 security=HTTPBearer()
 
+#-----------------------------add many movies to watchlist-----------------------
+# Declared before POST /{movie_id}, which would otherwise capture "/bulk".
+
+@router.post("/bulk", dependencies=[Depends(security)], response_model=WatchlistBulkOut)
+@login_required
+async def add_movies_to_watchlist(payload: WatchlistBulkCreate, request:Request, db: Session = Depends(get_db)):
+    '''Add several movies to the authenticated user's watchlist, reporting the outcome per movie id.'''
+    user = request.state.user
+    service=WatchlistService(db)
+    return await run_db(service.add_bulk_to_watchlist, user.id, payload.movie_ids, payload.status)
+
+#-----------------------------check many movies at once--------------------------
+# Also declared before POST /{movie_id}. Listed in READ_ONLY_POST_PATHS (app.middleware.middleware).
+
+@router.post("/check", dependencies=[Depends(security)], response_model=List[WatchlistCheckItem])
+@login_required
+async def check_movies_in_watchlist(payload: WatchlistCheckRequest, request:Request, db: Session = Depends(get_read_db)):
+    '''Check which of several movies (e.g. one catalog page) are in the user's watchlist.'''
+    user = request.state.user
+    service=WatchlistService(db)
+    return await run_db(service.check_many, user.id, payload.movie_ids)
+
 #-----------------------------add new movies to watchlist------------------------
 
 @router.post("/{movie_id}", dependencies=[Depends(security)], response_model=List[WatchlistOut])
@@ -27,7 +54,7 @@ async def add_movie_to_watchlist(movie_id: int, payload: WatchlistCreate, reques
     movie_ids = [movie_id]
     user = request.state.user
     service=WatchlistService(db)  
-    added = service.add_to_watchlist(user.id, movie_ids, payload.status)
+    added = await run_db(service.add_to_watchlist, user.id, movie_ids, payload.status)
     return added
 
 #------------------------------update user watchlist-----------------------------
@@ -38,7 +65,7 @@ async def update_watchlist(movie_id: int, payload: WatchlistUpdate, request:Requ
     '''Update the status of a specific movie in the user's watchlist.'''
     user = request.state.user
     service=WatchlistService(db)   
-    return service.update_watchlist_status(user.id, movie_id, payload.status)
+    return await run_db(service.update_watchlist_status, user.id, movie_id, payload.status)
 
 
 #-----------------------------get user watchlist---------------------------------
@@ -47,17 +74,28 @@ async def update_watchlist(movie_id: int, payload: WatchlistUpdate, request:Requ
 @login_required
 async def get_all_watchlist(
     request:Request,
-    db: Session = Depends(get_db),
-    page: int = Query(1),
-    size: int = Query(10),
+    response:Response,
+    db: Session = Depends(get_read_db),
+    page: int = Query(1, ge=1),
+    size: int = Query(10, ge=1),
     sort: str = Query("created_at"),
     desc: bool = Query(True),
-    status_filter: Optional[str] = Query(None)
+    status_filter: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(False)
 ):
-    '''Retrieve all movies in the user's watchlist with optional pagination and filters.'''
+    '''Retrieve all movies in the user's watchlist with optional pagination and filters.
+
+    The next page is fetched by passing the `X-Next-Cursor` response header back as
+    `cursor`; the header is absent on the last page. With `include_total=true` the
+    (cached) total is returned in `X-Total-Count`.'''
     user = request.state.user
     service=WatchlistService(db)   
-    result = service.get_user_watchlist(user.id, status_filter, sort, desc, page, size)
+    result = await run_db(service.get_user_watchlist, user.id, status_filter, sort, desc, page, size, cursor, include_total)
+    if result["next_cursor"]:
+        response.headers["X-Next-Cursor"] = result["next_cursor"]
+    if result["total"] is not None:
+        response.headers["X-Total-Count"] = str(result["total"])
     return result["items"]
 
 
@@ -69,7 +107,7 @@ async def remove_from_watchlist(movie_id: int, request:Request,db: Session = Dep
     '''Remove a single movie from the authenticated user's watchlist.'''
     user=request.state.user
     service=WatchlistService(db) 
-    return service.delete_from_watchlist(user.id, movie_id)
+    return await run_db(service.delete_from_watchlist, user.id, movie_id)
 
 #-----------------------------delete bulk watchlist--------------------------------
 
@@ -79,27 +117,65 @@ async def remove_bulk_from_watchlist(movie_ids: List[int],request:Request, db: S
     '''Remove multiple movies from the authenticated user's watchlist in one operation.'''
     user=request.state.user
     service=WatchlistService(db) 
-    return service.delete_bulk_watchlist(user.id, movie_ids)
+    return await run_db(service.delete_bulk_watchlist, user.id, movie_ids)
+
+#-----------------------------export the whole watchlist-------------------------
+# Declared before GET /{movie_id}, which would otherwise capture "/export".
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+async def _stream_chunks(chunks):
+    '''Pull each chunk on the DB executor, so the event loop never waits on the cursor.'''
+    try:
+        while True:
+            chunk = await run_db(next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        await run_db(chunks.close)
+
+
+@router.get("/export", dependencies=[Depends(security)])
+@login_required
+async def export_watchlist(
+    request:Request,
+    db: Session = Depends(get_read_db),
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$")
+):
+    '''Stream the authenticated user's whole watchlist, with movie titles, as NDJSON or CSV.
+
+    Rows are read through a server-side cursor and sent batch by batch, so memory use does
+    not grow with the size of the watchlist. The request's session is closed once the
+    response has been sent.'''
+    user=request.state.user
+    service=WatchlistService(db)
+    return StreamingResponse(
+        _stream_chunks(service.export_watchlist(user.id, export_format)),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="watchlist.{export_format}"'},
+    )
 
 #-----------------------------check whether movie is in watchlist-------------------
 
 @router.get("/{movie_id}",dependencies=[Depends(security)])
 @login_required
-async def check_movie_in_watchlist(movie_id: int, request:Request, db: Session = Depends(get_db)):
+async def check_movie_in_watchlist(movie_id: int, request:Request, db: Session = Depends(get_read_db)):
     '''Check whether a specific movie is already present in the user's watchlist.'''
     user=request.state.user
     service=WatchlistService(db) 
-    return service.check_watchlist(user.id, movie_id)
+    return await run_db(service.check_watchlist, user.id, movie_id)
 
 
 #-----------------------------get summary of watchlist----------------------------
 
 @router.get("/summary/all",dependencies=[Depends(security)])
 @login_required
-async def get_watchlist_summary(request:Request,db: Session = Depends(get_db)):
+async def get_watchlist_summary(request:Request,db: Session = Depends(get_read_db)):
     '''Retrieve a summary of the user's watchlist, including counts of total movies,
     watched movies, and movies yet to watch'''
     user=request.state.user
     service=WatchlistService(db) 
-    return service.get_summary(user.id)
+    return await run_db(service.get_summary, user.id)
 
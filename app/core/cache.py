@@ -0,0 +1,93 @@
+'''This module provides a small in-process cache used to keep hot lookups
+(such as the authenticated user) away from the database.
+
+`TTLCache` is a bounded LRU mapping whose entries also expire after a
+time-to-live. It keeps hit/miss counters so callers can report how effective
+the cache is. Besides the number of entries, it can bound their total weight
+(`max_weight`, with `weigh(value)` giving each entry's weight) for values whose
+size varies a lot.'''
+
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+
+    ''' Bounded LRU cache with per-entry expiry and hit/miss counters.'''
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0, max_weight: int | None = None, weigh=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self.weigh = weigh or (lambda value: 1)
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        '''Return the cached value for `key`, or `default` if missing or expired.'''
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at, weight = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.weight -= weight
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float | None = None):
+        '''Store `value` under `key`, evicting the least recently used entry if full.'''
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        weight = self.weigh(value)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.weight -= old[2]
+            self._data[key] = (value, expires_at, weight)
+            self.weight += weight
+            while len(self._data) > self.max_size or (
+                self.max_weight is not None and self.weight > self.max_weight and self._data
+            ):
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self.weight -= evicted
+                self.evictions += 1
+
+    def invalidate(self, key):
+        '''Drop a single entry from the cache.'''
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is not None:
+                self.weight -= entry[2]
+
+    def clear(self):
+        '''Drop every entry from the cache.'''
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        '''Return the current size and hit/miss counters.'''
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "weight": self.weight,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
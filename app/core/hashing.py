@@ -0,0 +1,107 @@
+'''Dedicated CPU executor for Argon2 password hashing and verification.
+
+Argon2 is deliberately expensive. Running it inline (or on the shared anyio
+threadpool) lets a burst of logins starve every other endpoint, so hashing is
+sent to a small process pool instead. The number of operations waiting for or
+running in the pool is capped; once the cap is reached new requests are rejected
+immediately with `HashingUnavailable` (a 503 for the client, see
+`app.core.security`) instead of queueing behind the burst.
+
+If a pool worker dies (OOM kill, SIGKILL), the pool is marked broken and
+would fail every later call. The broken pool is then replaced with a fresh
+one and the operation is retried once.
+
+This module is imported by the pool's worker processes, so it must stay light:
+it only depends on passlib and the configuration module.'''
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from passlib.context import CryptContext
+from app.core.config import PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING
+
+pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+
+_executor = None
+_pending = 0
+
+
+class HashingUnavailable(Exception):
+    '''Raised when a hashing operation cannot be run right now.'''
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def get_executor():
+    '''Return the process pool, creating it on first use.
+
+    Returns None when `PASSWORD_HASH_WORKERS` is 0, in which case hashing runs
+    on a worker thread instead.'''
+    global _executor
+    if _executor is None and PASSWORD_HASH_WORKERS > 0:
+        _executor = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def shutdown_executor():
+    '''Stop the process pool; called when the application shuts down.'''
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+def _replace_broken_executor(broken):
+    '''Discard `broken` and start a new pool, unless another caller already did.'''
+    global _executor
+    if _executor is broken:
+        _executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+    return get_executor()
+
+
+def queue_depth() -> int:
+    '''Number of hashing operations currently queued or running.'''
+    return _pending
+
+
+async def _submit(func, *args):
+    global _pending
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        raise HashingUnavailable("hashing queue is full")
+    _pending += 1
+    try:
+        executor = get_executor()
+        if executor is None:
+            return await asyncio.to_thread(func, *args)
+        try:
+            return await asyncio.wrap_future(executor.submit(func, *args))
+        except BrokenProcessPool:
+            executor = _replace_broken_executor(executor)
+        try:
+            return await asyncio.wrap_future(executor.submit(func, *args))
+        except BrokenProcessPool:
+            _replace_broken_executor(executor)
+            raise HashingUnavailable("hashing pool is restarting")
+    finally:
+        _pending -= 1
+
+
+async def hash_in_pool(password: str) -> str:
+    '''Hash a password on the CPU executor.'''
+    return await _submit(_hash, password)
+
+
+async def verify_in_pool(plain_password: str, hashed_password: str) -> bool:
+    '''Verify a password against its hash on the CPU executor.'''
+    return await _submit(_verify, plain_password, hashed_password)
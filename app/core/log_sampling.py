@@ -0,0 +1,60 @@
+'''Sampling and rate-capping for high-volume log events.
+
+Some events (for example "Auth Skipped (Exempt Path)" or "JWT Verified") are
+emitted once per request. `LogSampler` keeps their volume bounded:
+
+    - a per-event sample rate keeps only a fraction of the events;
+    - a per-second cap limits how many of each event are written in any one second.
+      When the next second starts, the caller is told how many were suppressed so it
+      can write a single summary line instead.
+
+`EventLogger` only consults the sampler for levels below WARNING; warnings and
+errors are always written.'''
+
+import random
+import time
+
+
+def parse_sample_rates(spec: str) -> dict:
+    '''Parse `"Event A=0.1,Event B=0.5"` into `{"Event A": 0.1, "Event B": 0.5}`.'''
+    rates = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, _, rate = item.rpartition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+class LogSampler:
+
+    ''' Decides whether an event should be written, per event name.'''
+
+    def __init__(self, sample_rates: dict | None = None, per_second_cap: int = 0):
+        self.sample_rates = sample_rates or {}
+        self.per_second_cap = per_second_cap
+        # event name -> [second, written in that second, suppressed in that second]
+        self._windows = {}
+
+    def rate_for(self, event: str) -> float:
+        return self.sample_rates.get(event, 1.0)
+
+    def allow(self, event: str):
+        '''Return `(write, suppressed)`: whether to write this event, and how many
+        events of this name were suppressed by the cap in the previous second.'''
+        rate = self.sample_rates.get(event)
+        if rate is not None and random.random() >= rate:
+            return False, 0
+
+        second = int(time.monotonic())
+        window = self._windows.get(event)
+        if window is None or window[0] != second:
+            suppressed = window[2] if window else 0
+            self._windows[event] = [second, 1, 0]
+            return True, suppressed
+
+        if self.per_second_cap and window[1] >= self.per_second_cap:
+            window[2] += 1
+            return False, 0
+        window[1] += 1
+        return True, 0
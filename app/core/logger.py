@@ -2,40 +2,255 @@
 
 It ensures that all application events — such as authentication attempts, user
 actions, database operations, and system events — are captured in both the
-console and rotating log files.'''
+console and rotating log files.
 
+Request handlers never touch the log file or console directly: the `auth`
+logger only puts records on a bounded in-memory queue, and a background
+listener thread writes them out in batches, flushing each handler once per
+batch. When the queue is full, records are either dropped (the default) or the
+caller blocks for a short time, depending on `LOG_QUEUE_POLICY`. Each handler has
+its own level, and the logger level is the lowest of them, so a disabled level
+costs no more than a level check.
+
+Application code logs through `events`, the structured event API:
+
+    events.info("User Logged In", username=user.username, role=user.role)
+
+Each call names the event and passes its fields as keyword arguments. If the
+level is disabled the call returns immediately; otherwise the fields ride on the
+record unserialized and `JsonFormatter` adds the timestamp and renders one JSON
+line per event on the listener thread. Events below WARNING also pass through a
+`LogSampler` (per-event sample rates and a per-second cap, see
+`app.core.log_sampling`).'''
+
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import os
-from datetime import datetime
+from datetime import datetime, timezone
+from app.core.config import (
+    LOG_DIR, LOG_FILE_LEVEL, LOG_CONSOLE_LEVEL, LOG_QUEUE_SIZE, LOG_QUEUE_POLICY,
+    LOG_QUEUE_BLOCK_TIMEOUT_SECONDS, LOG_BATCH_SIZE, LOG_SAMPLE_RATES, LOG_EVENT_RATE_CAP
+)
+from app.core.log_sampling import LogSampler, parse_sample_rates
 
 # Create logs directory if missing
-LOG_DIR = "logs"
 os.makedirs(LOG_DIR, exist_ok=True)
 
 # Log file path
 LOG_FILE = os.path.join(LOG_DIR, "auth.log")
 
-# Define log format (structured)
-LOG_FORMAT = (
-    "%(asctime)s | %(levelname)s | %(name)s | %(module)s | "
-    "message=%(message)s"
-)
 
-# Configure logger
-logger = logging.getLogger("auth")
-logger.setLevel(logging.DEBUG)  
+class JsonFormatter(logging.Formatter):
+
+    '''Renders each record as a single JSON line.'''
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+        }
+        fields = getattr(record, "event_fields", None)
+        if fields is not None:
+            entry["event"] = record.msg
+            entry.update(fields)
+        else:
+            entry["message"] = record.getMessage()
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class EventLogger:
+
+    '''Structured event API: `events.info("Event Name", key=value, ...)`.
+
+    Nothing is built, timestamped or serialized unless the level is enabled and,
+    below WARNING, the sampler lets the event through.'''
+
+    def __init__(self, logger: logging.Logger, sampler: LogSampler | None = None):
+        self.logger = logger
+        self.sampler = sampler
+
+    def _emit(self, level, event, fields):
+        if self.sampler is not None and level < logging.WARNING:
+            write, suppressed = self.sampler.allow(event)
+            if suppressed:
+                self.logger.log(
+                    level, "Log Events Suppressed",
+                    extra={"event_fields": {"suppressed_event": event, "suppressed": suppressed}},
+                    stacklevel=3,
+                )
+            if not write:
+                return
+            rate = self.sampler.rate_for(event)
+            if rate < 1.0:
+                fields["sample_rate"] = rate
+        # stacklevel=3 attributes the record to the module that called debug()/info()/...
+        self.logger.log(level, event, extra={"event_fields": fields}, stacklevel=3)
+
+    def debug(self, event: str, **fields):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._emit(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields):
+        if self.logger.isEnabledFor(logging.INFO):
+            self._emit(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields):
+        if self.logger.isEnabledFor(logging.WARNING):
+            self._emit(logging.WARNING, event, fields)
+
+    def error(self, event: str, **fields):
+        if self.logger.isEnabledFor(logging.ERROR):
+            self._emit(logging.ERROR, event, fields)
+
+
+class _BatchFlushMixin:
+
+    '''Skips the per-record flush done by `StreamHandler.emit`; the listener
+    calls `flush_batch()` once after writing a whole batch instead.'''
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class BatchFileHandler(_BatchFlushMixin, RotatingFileHandler):
+    '''Rotating file handler that flushes once per batch.'''
+
+
+class BatchStreamHandler(_BatchFlushMixin, logging.StreamHandler):
+    '''Console handler that flushes once per batch.'''
+
+
+class BoundedQueueHandler(QueueHandler):
+
+    '''Puts records on a bounded queue, dropping or briefly blocking when it is full.'''
+
+    def __init__(self, log_queue, policy: str = "drop", block_timeout: float = 0.05):
+        super().__init__(log_queue)
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting is left to the listener thread. Only render exception
+        # info here, because traceback objects must not outlive the caller.
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.policy == "block":
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingQueueListener(QueueListener):
+
+    '''Drains the log queue in batches of up to `batch_size` records.'''
+
+    def __init__(self, log_queue, *handlers, batch_size: int = 256, source=None):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+        self.source = source
+        self._reported_drops = 0
+
+    def enqueue_sentinel(self):
+        # Block rather than fail if the queue is full, so shutdown always drains.
+        self.queue.put(self._sentinel)
+
+    def _monitor(self):
+        q = self.queue
+        while True:
+            record = q.get(block=True)
+            batch = [record]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                    continue
+                self.handle(record)
+            self._report_drops()
+            for handler in self.handlers:
+                handler.flush_batch()
+            if stop:
+                return
+
+    def _report_drops(self):
+        dropped = self.source.dropped if self.source else 0
+        if dropped > self._reported_drops:
+            record = logging.LogRecord(
+                "auth", logging.WARNING, __file__, 0, "Log Records Dropped", None, None,
+            )
+            record.event_fields = {"dropped": dropped - self._reported_drops}
+            self._reported_drops = dropped
+            self.handle(record)
+
 
 # File handler (rotating)
-file_handler = RotatingFileHandler(
+file_handler = BatchFileHandler(
     LOG_FILE, maxBytes=5*1024*1024, backupCount=5, encoding="utf-8"
 )
-file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+file_handler.setFormatter(JsonFormatter())
+file_handler.setLevel(LOG_FILE_LEVEL)
 
 # Console handler
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+console_handler = BatchStreamHandler()
+console_handler.setFormatter(JsonFormatter())
+console_handler.setLevel(LOG_CONSOLE_LEVEL)
+
+# Queue feeding the background listener
+log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+queue_handler = BoundedQueueHandler(
+    log_queue, policy=LOG_QUEUE_POLICY, block_timeout=LOG_QUEUE_BLOCK_TIMEOUT_SECONDS
+)
+listener = BatchingQueueListener(
+    log_queue, file_handler, console_handler, batch_size=LOG_BATCH_SIZE, source=queue_handler
+)
+
+# Configure logger
+logger = logging.getLogger("auth")
+logger.setLevel(min(file_handler.level, console_handler.level))
+logger.addHandler(queue_handler)
+
+# Structured event API used throughout the application
+events = EventLogger(
+    logger,
+    LogSampler(parse_sample_rates(LOG_SAMPLE_RATES), per_second_cap=LOG_EVENT_RATE_CAP),
+)
+
+
+def start_logging():
+    '''Start the background listener thread (idempotent).'''
+    if listener._thread is None:
+        listener.start()
+
+
+def stop_logging():
+    '''Drain every queued record to the handlers and stop the listener thread.'''
+    if listener._thread is not None:
+        listener.stop()
+        file_handler.close()
+
 
-# Add handlers
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+start_logging()
+atexit.register(stop_logging)
@@ -0,0 +1,244 @@
+'''In-process metrics with Prometheus text exposition.
+
+`MetricsMiddleware` records, per route template (e.g. `/watchlist/{movie_id}`),
+the request count by status class, a latency histogram and an in-flight gauge.
+Other subsystems (DB pool, caches, hashing queue) contribute point-in-time
+values through collector callables registered with `metrics.register_collector`.
+
+Recording happens on the event loop thread and only touches plain dicts, so no
+locks are taken on the request path. With several uvicorn workers, set
+`METRICS_MULTIPROC_DIR`: each worker periodically writes its samples to
+`<dir>/<pid>.json`, and `/metrics` sums the samples of every worker.
+Snapshots of workers that are no longer running are deleted when read. Gauges
+are only taken from snapshots written within `STALE_SNAPSHOT_INTERVALS`
+flushes, so a stuck worker cannot pin in-flight or pool gauges at an old value.'''
+
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from starlette.routing import Match
+from app.core.config import METRICS_MULTIPROC_DIR, METRICS_FLUSH_SECONDS
+
+# A snapshot older than this many flush intervals no longer contributes gauges.
+STALE_SNAPSHOT_INTERVALS = 3
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help)
+METRIC_META = {
+    "http_requests_total": ("counter", "HTTP requests by route template, method and status class."),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency by route template and method."),
+    "http_requests_in_flight": ("gauge", "HTTP requests currently being served."),
+}
+
+
+class Metrics:
+
+    ''' Registry of request metrics plus pluggable collectors.'''
+
+    def __init__(self):
+        self._requests = defaultdict(int)
+        self._latency = {}
+        self._in_flight = defaultdict(int)
+        self._collectors = []
+
+    def register_collector(self, collector):
+        '''Register a callable returning `(name, type, help, labels, value)` tuples.'''
+        self._collectors.append(collector)
+
+    def track_in_flight(self, method: str, route: str, delta: int):
+        self._in_flight[(method, route)] += delta
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        '''Record one finished request.'''
+        self._requests[(method, route, f"{status // 100}xx")] += 1
+        series = self._latency.get((method, route))
+        if series is None:
+            series = self._latency[(method, route)] = [0] * (len(LATENCY_BUCKETS) + 2)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                series[i] += 1
+                break
+        series[-2] += seconds
+        series[-1] += 1
+
+    def samples(self):
+        '''Return every sample of this process as `(name, labels, value)` tuples.'''
+        out = []
+        for (method, route, status_class), count in list(self._requests.items()):
+            out.append(("http_requests_total",
+                        (("method", method), ("route", route), ("status_class", status_class)), count))
+        for (method, route), series in list(self._latency.items()):
+            labels = (("method", method), ("route", route))
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, series):
+                cumulative += count
+                out.append(("http_request_duration_seconds_bucket", labels + (("le", str(bound)),), cumulative))
+            out.append(("http_request_duration_seconds_bucket", labels + (("le", "+Inf"),), series[-1]))
+            out.append(("http_request_duration_seconds_sum", labels, series[-2]))
+            out.append(("http_request_duration_seconds_count", labels, series[-1]))
+        for (method, route), value in list(self._in_flight.items()):
+            out.append(("http_requests_in_flight", (("method", method), ("route", route)), value))
+        for collector in self._collectors:
+            for name, kind, help_text, labels, value in collector():
+                METRIC_META.setdefault(name, (kind, help_text))
+                out.append((name, tuple(sorted(labels.items())), value))
+        return out
+
+
+metrics = Metrics()
+
+
+def _snapshot_path():
+    return os.path.join(METRICS_MULTIPROC_DIR, f"{os.getpid()}.json")
+
+
+def write_snapshot():
+    '''Write this worker's samples to the shared metrics directory.'''
+    path = _snapshot_path()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"meta": METRIC_META, "samples": metrics.samples()}, f)
+    os.replace(tmp_path, path)
+
+
+def remove_snapshot():
+    '''Remove this worker's snapshot file on shutdown.'''
+    try:
+        os.remove(_snapshot_path())
+    except FileNotFoundError:
+        pass
+
+
+async def run_metrics_flusher(interval: float = METRICS_FLUSH_SECONDS):
+    '''Background task writing this worker's snapshot every `interval` seconds.'''
+    os.makedirs(METRICS_MULTIPROC_DIR, exist_ok=True)
+    while True:
+        await asyncio.to_thread(write_snapshot)
+        await asyncio.sleep(interval)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _live_snapshots():
+    '''Yield `(snapshot, fresh)` for every running worker's snapshot file.
+
+    Files left by workers that died without a graceful shutdown are removed.
+    `fresh` is False when the worker has not flushed for a few intervals.'''
+    stale_before = time.time() - STALE_SNAPSHOT_INTERVALS * METRICS_FLUSH_SECONDS
+    for filename in os.listdir(METRICS_MULTIPROC_DIR):
+        pid, ext = os.path.splitext(filename)
+        if ext != ".json" or not pid.isdigit():
+            continue
+        path = os.path.join(METRICS_MULTIPROC_DIR, filename)
+        try:
+            if not _pid_alive(int(pid)):
+                os.remove(path)
+                continue
+            fresh = os.path.getmtime(path) >= stale_before
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        yield snapshot, fresh
+
+
+def collect_samples():
+    '''Samples of this worker, summed with every other worker's snapshot if enabled.
+
+    Counters and histograms are summed over all running workers; gauges only
+    over workers whose snapshot is fresh.'''
+    if not METRICS_MULTIPROC_DIR:
+        return metrics.samples()
+
+    write_snapshot()
+    totals = defaultdict(float)
+    for snapshot, fresh in _live_snapshots():
+        for name, meta in snapshot["meta"].items():
+            METRIC_META.setdefault(name, tuple(meta))
+        for name, labels, value in snapshot["samples"]:
+            if not fresh and METRIC_META.get(_family(name), ("untyped",))[0] == "gauge":
+                continue
+            totals[(name, tuple(tuple(pair) for pair in labels))] += value
+    return [(name, labels, value) for (name, labels), value in totals.items()]
+
+
+def _family(name: str):
+    for suffix in ("_bucket", "_sum", "_count"):
+        if name.endswith(suffix) and name[: -len(suffix)] in METRIC_META:
+            return name[: -len(suffix)]
+    return name
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_text(samples) -> str:
+    '''Render samples in the Prometheus text exposition format.'''
+    by_family = defaultdict(list)
+    for name, labels, value in samples:
+        by_family[_family(name)].append((name, labels, value))
+
+    lines = []
+    for family in sorted(by_family):
+        kind, help_text = METRIC_META.get(family, ("untyped", ""))
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} {kind}")
+        for name, labels, value in by_family[family]:
+            label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+
+    ''' Plain ASGI middleware that records per-route request metrics.'''
+
+    def __init__(self, app, router):
+        self.app = app
+        self.router = router
+
+    def route_template(self, scope) -> str:
+        '''Return the path template of the route that will serve this request.'''
+        partial = None
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match is Match.FULL:
+                return route.path
+            if match is Match.PARTIAL and partial is None:
+                partial = route.path
+        return partial or "<unmatched>"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self.route_template(scope)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.track_in_flight(method, route, 1)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.track_in_flight(method, route, -1)
+            metrics.observe_request(method, route, status, time.perf_counter() - start)
@@ -0,0 +1,163 @@
+'''Rate limiting for the expensive authentication endpoints.
+
+`/auth/login` and `/auth/register` each cost an Argon2 operation, so attempts are
+limited per client IP and per email before any database or hashing work is done.
+
+Limits use a sliding-window counter: for every key we keep the number of hits in
+the current and the previous fixed window, and estimate the rolling count as
+`previous * (1 - elapsed_fraction) + current`. That needs a constant amount of
+state per key, and the number of keys is bounded as well.
+
+Two backends are provided:
+    - `MemoryBackend`: counters live in this process (the default).
+    - `SQLiteBackend`: counters live in a SQLite file, so every worker on the same
+      host shares them. Point `RATE_LIMIT_SQLITE_PATH` at a tmpfs such as `/dev/shm`.
+      A hit can wait on the file lock, so it runs on a worker thread.'''
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Request
+from app.core.config import (
+    RATE_LIMIT_BACKEND, RATE_LIMIT_SQLITE_PATH, RATE_LIMIT_MAX_KEYS,
+    AUTH_RATE_LIMIT_WINDOW_SECONDS, AUTH_RATE_LIMIT_PER_IP, AUTH_RATE_LIMIT_PER_EMAIL
+)
+from app.core.logger import *
+from app.core.sqlite_store import SQLiteStore
+
+
+def _sliding_count(window_index, current, previous, now, window):
+    elapsed = (now / window) - window_index
+    return previous * (1.0 - elapsed) + current
+
+
+class MemoryBackend:
+
+    ''' Sliding-window counters kept in this process, bounded by an LRU over keys.'''
+
+    blocking = False
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._counters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, window: float) -> float:
+        '''Record a hit for `key` and return the estimated count in the last `window` seconds.'''
+        now = time.time()
+        index = math.floor(now / window)
+        with self._lock:
+            stored_index, current, previous = self._counters.get(key, (index, 0, 0))
+            if stored_index == index - 1:
+                previous, current = current, 0
+            elif stored_index != index:
+                previous, current = 0, 0
+            current += 1
+            self._counters[key] = (index, current, previous)
+            self._counters.move_to_end(key)
+            while len(self._counters) > self.max_keys:
+                self._counters.popitem(last=False)
+        return _sliding_count(index, current, previous, now, window)
+
+
+class SQLiteBackend:
+
+    ''' Sliding-window counters shared by all workers on a host through a SQLite file.'''
+
+    blocking = True
+
+    def __init__(self, path: str = RATE_LIMIT_SQLITE_PATH, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self.store = SQLiteStore(
+            path,
+            "CREATE TABLE IF NOT EXISTS rate_limit ("
+            "key TEXT PRIMARY KEY, window_index INTEGER, current INTEGER, "
+            "previous INTEGER, touched REAL)",
+        )
+
+    def hit(self, key: str, window: float) -> float:
+        '''Record a hit for `key` and return the estimated count in the last `window` seconds.'''
+        now = time.time()
+        index = math.floor(now / window)
+        with self.store.transaction() as conn:
+            row = conn.execute(
+                "SELECT window_index, current, previous FROM rate_limit WHERE key = ?", (key,)
+            ).fetchone()
+            stored_index, current, previous = row or (index, 0, 0)
+            if stored_index == index - 1:
+                previous, current = current, 0
+            elif stored_index != index:
+                previous, current = 0, 0
+            current += 1
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit (key, window_index, current, previous, touched) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, index, current, previous, now),
+            )
+            if self.store.trim_due():
+                self._evict(conn, now, window)
+        return _sliding_count(index, current, previous, now, window)
+
+    def _evict(self, conn, now, window):
+        '''Drop stale keys, then the least recently touched ones beyond `max_keys`.'''
+        conn.execute("DELETE FROM rate_limit WHERE touched < ?", (now - 2 * window,))
+        self.store.trim(conn, "rate_limit", "key", "touched", self.max_keys)
+
+
+class RateLimiter:
+
+    ''' Allows at most `limit` hits per key within a sliding `window` (seconds).'''
+
+    def __init__(self, backend, limit: int, window: float):
+        self.backend = backend
+        self.limit = limit
+        self.window = window
+
+    def allow(self, key: str) -> bool:
+        '''Count a hit for `key`; return False if it exceeds the limit.'''
+        return self.backend.hit(key, self.window) <= self.limit
+
+
+def _build_backend():
+    if RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteBackend()
+    return MemoryBackend()
+
+
+_backend = _build_backend()
+ip_limiter = RateLimiter(_backend, AUTH_RATE_LIMIT_PER_IP, AUTH_RATE_LIMIT_WINDOW_SECONDS)
+email_limiter = RateLimiter(_backend, AUTH_RATE_LIMIT_PER_EMAIL, AUTH_RATE_LIMIT_WINDOW_SECONDS)
+
+
+async def enforce_auth_rate_limit(request: Request, action: str, email: str):
+    '''Raise `429 Too Many Requests` if the client IP or the email has exceeded
+    its limit for `action`. Must be called before any DB query or hashing.
+
+    With a blocking backend the check runs on a worker thread, so the event
+    loop never waits on the backend's lock.'''
+    client_ip = request.client.host if request.client else "unknown"
+    if ip_limiter.backend.blocking or email_limiter.backend.blocking:
+        await asyncio.to_thread(_check_auth_rate_limit, client_ip, action, email)
+    else:
+        _check_auth_rate_limit(client_ip, action, email)
+
+
+def _check_auth_rate_limit(client_ip: str, action: str, email: str):
+    checks = (
+        (ip_limiter, f"{action}:ip:{client_ip}"),
+        (email_limiter, f"{action}:email:{email.lower()}"),
+    )
+    for limiter, key in checks:
+        if not limiter.allow(key):
+            events.warning(
+                "Rate Limit Exceeded",
+                action=action,
+                key=key,
+            )
+            raise HTTPException(
+                status_code=429,
+                detail="Too many attempts, please try again later",
+                headers={"Retry-After": str(int(AUTH_RATE_LIMIT_WINDOW_SECONDS))},
+            )
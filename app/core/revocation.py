@@ -0,0 +1,106 @@
+'''In-memory token revocation list.
+
+Logging out marks the `User_Logins` row for a token as `suspended`. To honour
+that on every request without a database lookup, each worker keeps the `jti`
+of every revoked, not-yet-expired token in a dictionary. Lookups are O(1).
+
+Revocations made in this process are applied immediately; revocations made by
+other workers are picked up by `refresh()`, which only reads rows revoked since
+the previous refresh (using the `revoked_at` column as a watermark).'''
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from app.core.config import REVOCATION_REFRESH_SECONDS, REVOCATION_REFRESH_OVERLAP_SECONDS
+from app.core.logger import *
+from app.models.user import UserLogins
+
+
+def _to_epoch(value: datetime | None) -> float:
+    '''Convert a (possibly naive, UTC) database timestamp to epoch seconds.'''
+    if value is None:
+        return time.time()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class TokenRevocationList:
+
+    ''' Set of revoked token ids (`jti`) mapped to the time they expire.'''
+
+    def __init__(self):
+        self._revoked = {}
+        self._watermark = None
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti: str | None) -> bool:
+        '''Return True if the token with this `jti` has been revoked.'''
+        if jti is None:
+            return False
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def revoke(self, jti: str | None, expires_at: datetime | None = None):
+        '''Mark a token id as revoked in this process.'''
+        if jti is None:
+            return
+        with self._lock:
+            self._revoked[jti] = _to_epoch(expires_at)
+
+    def prune(self):
+        '''Forget revoked tokens whose expiry has passed; they fail verification anyway.'''
+        now = time.time()
+        with self._lock:
+            self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+
+    def refresh(self, db):
+        '''Load revocations written since the last refresh, by any worker.'''
+        query = db.query(UserLogins.jti, UserLogins.expiration_date, UserLogins.revoked_at).filter(
+            UserLogins.status == "suspended",
+            UserLogins.jti.isnot(None),
+        )
+        if self._watermark is None:
+            query = query.filter(UserLogins.expiration_date > datetime.now(timezone.utc))
+        else:
+            overlap = timedelta(seconds=REVOCATION_REFRESH_OVERLAP_SECONDS)
+            query = query.filter(UserLogins.revoked_at >= self._watermark - overlap)
+
+        watermark = self._watermark
+        loaded = 0
+        for jti, expiration_date, revoked_at in query:
+            self.revoke(jti, expiration_date)
+            loaded += 1
+            if revoked_at is not None and (watermark is None or revoked_at > watermark):
+                watermark = revoked_at
+        self._watermark = watermark or datetime.now(timezone.utc).replace(tzinfo=None)
+        self.prune()
+        return loaded
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+revocation_list = TokenRevocationList()
+
+
+def refresh_revocations():
+    '''Refresh the process-wide revocation list with a short-lived session.'''
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return revocation_list.refresh(db)
+    finally:
+        db.close()
+
+
+async def run_revocation_refresher(interval: float = REVOCATION_REFRESH_SECONDS):
+    '''Background task that keeps this worker's revocation list in sync.'''
+    while True:
+        try:
+            await asyncio.to_thread(refresh_revocations)
+        except Exception as e:
+            events.warning("Revocation Refresh Failed", error=str(e))
+        await asyncio.sleep(interval)
@@ -3,13 +3,20 @@ including password validation and hashing, as well as JWT (JSON Web Token)
 creation and verification.'''
 
 import re
-from passlib.context import CryptContext
+import time
+import hashlib
+from uuid import uuid4
 from app.core.config import *
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
 from app.core.logger import *
+from app.core.revocation import revocation_list
+from fastapi import HTTPException
+from app.core.hashing import hash_in_pool, verify_in_pool, HashingUnavailable
+from app.core.cache import TTLCache
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Decoded payloads keyed by the SHA-256 digest of the token; each entry expires at the token's `exp`.
+jwt_cache = TTLCache(max_size=JWT_CACHE_MAX_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
  
 def is_strong_password(password: str):
     '''Checks whether a given password meets the application's strength requirements.'''
@@ -25,45 +32,80 @@ def is_strong_password(password: str):
         return False
     return True
  
-def hash_password(password: str):
-    ''' Hashes a given password using the Argon2 algorithm.'''
+async def hash_password_async(password: str):
+    '''Checks the password's strength, then hashes it with Argon2 on the hashing executor.'''
     if not is_strong_password(password):
-        logger.error(
-            {
-                "event": "Password Hashing Failed",
-                "reason": "Weak password provided",
-                "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
-            }
-        )
+        events.error("Password Hashing Failed", reason="Weak password provided")
         raise ValueError("Password is too weak")
-    return pwd_context.hash(password)
+    try:
+        return await hash_in_pool(password)
+    except HashingUnavailable as e:
+        raise _hashing_busy(e)
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    '''Verifies a password against its Argon2 hash on the hashing executor.'''
+    try:
+        return await verify_in_pool(plain_password, hashed_password)
+    except HashingUnavailable as e:
+        raise _hashing_busy(e)
+
+def _hashing_busy(error: HashingUnavailable) -> HTTPException:
+    events.warning("Password Hashing Unavailable", reason=str(error))
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+def token_digest(token: str) -> str:
+    '''Returns the fixed-width SHA-256 hex digest stored in place of a raw token.'''
+    return hashlib.sha256(token.encode()).hexdigest()
 
 # JWT functions
 def create_jwt(data: dict, expires_delta: timedelta = None):
     '''Creates a signed JWT access token containing the provided payload.'''
-    to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    token, _ = issue_jwt(data, expires_delta)
+    return token
+
+def issue_jwt(data: dict, expires_delta: timedelta = None):
+    '''Creates a signed JWT access token and returns it with its claims.
+
+    The expiry (`exp`, naive UTC) and the token id (`jti`) are always set here,
+    so callers that store them read them from the returned claims.'''
+    claims = data.copy()
+    claims["exp"] = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    claims["jti"] = uuid4().hex
+    # jose replaces datetimes with timestamps in the dict it is given.
+    return jwt.encode(dict(claims), SECRET_KEY, algorithm=ALGORITHM), claims
 
 def verify_jwt(token: str):
-    '''Verifies and decodes a JWT access token.'''
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        logger.debug(
-            {
-            "event": "JWT Verified",
-            "user_id": payload.get("user_id"),
-            "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
-            }
+    '''Verifies and decodes a JWT access token.
+
+    Successfully decoded payloads are cached until the token expires, so repeated
+    requests with the same token skip signature verification. The revocation list
+    is consulted on every call, cached or not.'''
+    key = hashlib.sha256(token.encode()).digest()
+    payload = jwt_cache.get(key)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError as e:
+            events.warning(
+                "JWT Verification Failed",
+                reason="Invalid or expired token",
+                error=str(e),
+            )
+            return None
+        exp = payload.get("exp")
+        if exp is not None and exp > time.time():
+            jwt_cache.set(key, payload, ttl=exp - time.time())
+
+    if revocation_list.is_revoked(payload.get("jti")):
+        events.warning(
+            "JWT Verification Failed",
+            reason="Token has been revoked",
+            user_id=payload.get("user_id"),
         )
-        return payload
-    except JWTError as e:
-        logger.warning({
-            "event": "JWT Verification Failed",
-            "reason": "Invalid or expired token",
-            "error": str(e),
-            "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
-        })
         return None
-     
\ No newline at end of file
+    events.debug("JWT Verified", user_id=payload.get("user_id"))
+    return payload
@@ -0,0 +1,63 @@
+'''SQLite file shared by the workers on one host.
+
+The shared rate-limit and watchlist-cache backends keep their state in a small
+SQLite file, which should live on a tmpfs such as `/dev/shm`. `SQLiteStore`
+holds what they have in common: one connection per thread in autocommit mode,
+WAL with `synchronous=OFF` (the data is a cache and may be lost on a crash),
+write transactions that take the lock up front, and a periodic trim that keeps
+the table bounded.'''
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Writes between two trims of a store's table.
+TRIM_EVERY_WRITES = 1000
+
+
+class SQLiteStore:
+
+    ''' Per-thread connections to a SQLite file, created with `schema` on first use.'''
+
+    def __init__(self, path: str, schema: str, busy_timeout: float = 1.0):
+        self.path = path
+        self.schema = schema
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._writes = 0
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(self.schema)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        '''Yield a connection inside `BEGIN IMMEDIATE`, so a read-modify-write
+        cannot interleave with another worker's.'''
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def trim_due(self) -> bool:
+        '''Count one write; True once every `TRIM_EVERY_WRITES` writes.'''
+        self._writes += 1
+        return self._writes % TRIM_EVERY_WRITES == 0
+
+    def trim(self, conn, table: str, key: str, newest_first: str, max_rows: int):
+        '''Delete the rows of `table` beyond the first `max_rows` by `newest_first`.'''
+        conn.execute(
+            f"DELETE FROM {table} WHERE {key} IN ("
+            f"SELECT {key} FROM {table} ORDER BY {newest_first} DESC LIMIT -1 OFFSET ?)",
+            (max_rows,),
+        )
@@ -0,0 +1,90 @@
+'''Per-process cache of authenticated user snapshots.
+
+The auth middleware resolves the user behind every JWT. Instead of opening a
+session and querying the `User` table on each request, it keeps a lightweight,
+detached snapshot of the user keyed by `user_id`. Entries are bounded by an LRU
+and expire after `USER_CACHE_TTL_SECONDS`.
+
+A session that changes or deletes a `User` row evicts that user once it commits,
+so the worker that made the write never serves the old snapshot. The cache is
+per process, though: the other workers keep their copy until it expires, so the
+TTL is how long a change (a suspension, a new role) can take to reach them.
+Keep it short.'''
+
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import event
+from app.core.cache import TTLCache
+from app.core.config import USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS
+from app.models.user import User
+from app.db.session import AppSession
+from app.db.replicas import mark_write
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+
+    '''Read-only copy of the `User` columns needed to authorize a request.'''
+
+    id: int
+    username: str
+    email: str
+    role: str
+    status: str
+    created_at: datetime | None
+
+    @classmethod
+    def from_user(cls, user: User):
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            role=user.role,
+            status=user.status,
+            created_at=user.created_at,
+        )
+
+
+user_cache = TTLCache(max_size=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+
+def load_user(db, user_id: int):
+    '''Load `user_id` with the session `db` and cache its snapshot.
+    Returns None if the user does not exist.'''
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        return None
+    snapshot = UserSnapshot.from_user(user)
+    user_cache.set(user_id, snapshot)
+    return snapshot
+
+
+def invalidate_user(user_id: int):
+    '''Drop the cached snapshot for a user after it has been written, and keep
+    reloading it from the primary until replicas have caught up.'''
+    user_cache.invalidate(user_id)
+    mark_write(user_id)
+
+
+@event.listens_for(AppSession, "after_flush")
+def _record_user_writes(session, flush_context):
+    # new/dirty/deleted still hold the pre-flush state here.
+    written = session.info.setdefault("written_users", set())
+    for obj in session.dirty:
+        if isinstance(obj, User) and session.is_modified(obj):
+            written.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            written.add(obj.id)
+
+
+@event.listens_for(AppSession, "after_commit")
+def _invalidate_written_users(session):
+    '''Evict the users a session wrote, once the write is visible to others.'''
+    for user_id in session.info.pop("written_users", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(AppSession, "after_rollback")
+def _forget_written_users(session):
+    session.info.pop("written_users", None)
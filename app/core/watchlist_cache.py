@@ -0,0 +1,244 @@
+'''Per-user watchlist cache.
+
+Membership checks, summaries and listing totals are read far more often than
+watchlists change. So each user's watchlist is cached as a `WatchlistSnapshot`
+holding every movie id with its status and `created_at`. The snapshot is
+loaded with one query on a miss. Users with more than
+`WATCHLIST_CACHE_MAX_ENTRIES` entries are cached as "too large", and their
+reads keep going to the database. Memory is bounded by the number of movies
+cached across all users, `WATCHLIST_CACHE_MAX_TOTAL_ENTRIES`, as well as by
+the number of users, so a few thousand large watchlists cannot fill a worker.
+
+Two backends are provided, chosen with `WATCHLIST_CACHE_BACKEND`:
+    - "memory": snapshots live in this process in an LRU over users.
+    - "sqlite": snapshots live in a SQLite file, so every worker on the host
+      sees the same entries and the same invalidations. Point
+      `WATCHLIST_CACHE_SQLITE_PATH` at a tmpfs such as `/dev/shm`.
+The default, "auto", picks "sqlite" when `WEB_CONCURRENCY` says the host runs
+more than one worker, and "memory" otherwise.
+
+Every write made through `WatchlistService` calls `invalidate_watchlist` once
+it has committed. A load that started before that invalidation is not
+stored, so a slow reader cannot put back a snapshot that predates the write.
+Entries also expire after `WATCHLIST_CACHE_TTL_SECONDS`, which bounds how
+stale a replica-loaded snapshot can be.
+
+The memory backend only invalidates the worker that handled the write. With
+several workers (or several hosts) it gives read-your-writes only when the
+next read reaches the same worker; another worker can serve its older
+snapshot for up to the TTL. Use "sqlite" whenever a host runs more than one
+worker, for example when starting uvicorn with `--workers` instead of
+`WEB_CONCURRENCY`.'''
+
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from app.core.cache import TTLCache
+from app.core.sqlite_store import SQLiteStore
+from app.core.config import (
+    WATCHLIST_CACHE_BACKEND, WATCHLIST_CACHE_SQLITE_PATH, WATCHLIST_CACHE_MAX_SIZE,
+    WATCHLIST_CACHE_MAX_ENTRIES, WATCHLIST_CACHE_MAX_TOTAL_ENTRIES, WATCHLIST_CACHE_TTL_SECONDS, WEB_CONCURRENCY
+)
+
+# How long an invalidation is remembered; loads never take this long.
+INVALIDATION_MEMORY_SECONDS = 60.0
+
+
+@dataclass(frozen=True)
+class WatchlistSnapshot:
+
+    '''Read-only copy of a user's watchlist: `{movie_id: (status, created_at)}`.
+    `entries` is None when the watchlist was too large to cache.'''
+
+    entries: dict | None
+
+    @property
+    def cacheable(self) -> bool:
+        return self.entries is not None
+
+    def size(self) -> int:
+        '''Movies held; a "too large" marker holds none.'''
+        return len(self.entries) if self.entries is not None else 0
+
+    def get(self, movie_id: int):
+        '''Return `(status, created_at)` for `movie_id`, or None if it is not in the watchlist.'''
+        return self.entries.get(movie_id)
+
+    def summary(self) -> dict:
+        statuses = [status for status, _ in self.entries.values()]
+        return {
+            "total_movies": len(statuses),
+            "to_watch": statuses.count("To Watch"),
+            "watched": statuses.count("Watched"),
+        }
+
+    def count(self, status=None) -> int:
+        if status is None:
+            return len(self.entries)
+        return sum(1 for entry_status, _ in self.entries.values() if entry_status == status)
+
+    def to_json(self) -> str:
+        if self.entries is None:
+            return "null"
+        return json.dumps([
+            [movie_id, status, created_at.isoformat() if created_at else None]
+            for movie_id, (status, created_at) in self.entries.items()
+        ])
+
+    @classmethod
+    def from_json(cls, raw: str):
+        rows = json.loads(raw)
+        if rows is None:
+            return cls(None)
+        return cls({
+            movie_id: (status, datetime.fromisoformat(created_at) if created_at else None)
+            for movie_id, status, created_at in rows
+        })
+
+
+class MemoryBackend:
+
+    ''' Snapshots kept in this process, bounded by an LRU over users and by the
+    total number of movies they hold.'''
+
+    def __init__(self, max_size: int = WATCHLIST_CACHE_MAX_SIZE, ttl: float = WATCHLIST_CACHE_TTL_SECONDS,
+                 max_total_entries: int = WATCHLIST_CACHE_MAX_TOTAL_ENTRIES):
+        self.snapshots = TTLCache(max_size=max_size, ttl=ttl, max_weight=max_total_entries,
+                                  weigh=WatchlistSnapshot.size)
+        self.invalidations = TTLCache(max_size=max_size, ttl=INVALIDATION_MEMORY_SECONDS)
+
+    def get(self, user_id: int):
+        return self.snapshots.get(user_id)
+
+    def set(self, user_id: int, snapshot: WatchlistSnapshot, loaded_since: float):
+        '''Store `snapshot` unless the user was invalidated after `loaded_since`.'''
+        if self.invalidations.get(user_id, 0.0) >= loaded_since:
+            return
+        self.snapshots.set(user_id, snapshot)
+
+    def invalidate(self, user_id: int):
+        self.invalidations.set(user_id, time.time())
+        self.snapshots.invalidate(user_id)
+
+    def clear(self):
+        self.snapshots.clear()
+        self.invalidations.clear()
+
+    def stats(self) -> dict:
+        stats = self.snapshots.stats()
+        stats["entries"] = stats.pop("weight")
+        return stats
+
+
+class SQLiteBackend:
+
+    ''' Snapshots shared by all workers on a host through a SQLite file.'''
+
+    def __init__(self, path: str = WATCHLIST_CACHE_SQLITE_PATH, max_size: int = WATCHLIST_CACHE_MAX_SIZE,
+                 ttl: float = WATCHLIST_CACHE_TTL_SECONDS, max_total_entries: int = WATCHLIST_CACHE_MAX_TOTAL_ENTRIES):
+        self.max_size = max_size
+        self.max_total_entries = max_total_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries_since_evict = 0
+        self.store = SQLiteStore(
+            path,
+            "CREATE TABLE IF NOT EXISTS watchlist_cache ("
+            "user_id INTEGER PRIMARY KEY, data TEXT, expires_at REAL, invalidated_at REAL)",
+        )
+
+    def get(self, user_id: int):
+        row = self.store.connection().execute(
+            "SELECT data FROM watchlist_cache WHERE user_id = ? AND data IS NOT NULL AND expires_at > ?",
+            (user_id, time.time()),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return WatchlistSnapshot.from_json(row[0])
+
+    def set(self, user_id: int, snapshot: WatchlistSnapshot, loaded_since: float):
+        '''Store `snapshot` unless the user was invalidated after `loaded_since`.'''
+        conn = self.store.connection()
+        conn.execute(
+            "INSERT INTO watchlist_cache (user_id, data, expires_at, invalidated_at) VALUES (?, ?, ?, 0) "
+            "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at "
+            "WHERE watchlist_cache.invalidated_at < ?",
+            (user_id, snapshot.to_json(), time.time() + self.ttl, loaded_since),
+        )
+        # Also evict early after large snapshots, so the total never overshoots by much.
+        self._entries_since_evict += snapshot.size()
+        if self.store.trim_due() or self._entries_since_evict > self.max_total_entries // 10:
+            self._entries_since_evict = 0
+            self._evict(conn)
+
+    def invalidate(self, user_id: int):
+        self.store.connection().execute(
+            "INSERT INTO watchlist_cache (user_id, data, expires_at, invalidated_at) VALUES (?, NULL, 0, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET data = NULL, invalidated_at = excluded.invalidated_at",
+            (user_id, time.time()),
+        )
+
+    def _evict(self, conn):
+        '''Drop expired rows, then the ones closest to expiry beyond `max_size`
+        rows or `max_total_entries` cached movies.'''
+        now = time.time()
+        conn.execute(
+            "DELETE FROM watchlist_cache WHERE expires_at < ? AND invalidated_at < ?",
+            (now, now - INVALIDATION_MEMORY_SECONDS),
+        )
+        self.store.trim(conn, "watchlist_cache", "user_id", "expires_at", self.max_size)
+        # Each snapshot is a JSON array with one element per movie.
+        conn.execute(
+            "UPDATE watchlist_cache SET data = NULL, expires_at = 0 WHERE user_id IN ("
+            "SELECT user_id FROM (SELECT user_id, SUM(json_array_length(data)) OVER ("
+            "ORDER BY expires_at DESC, user_id) AS running FROM watchlist_cache WHERE data IS NOT NULL) "
+            "WHERE running > ?)",
+            (self.max_total_entries,),
+        )
+
+    def clear(self):
+        self.store.connection().execute("DELETE FROM watchlist_cache")
+
+    def stats(self) -> dict:
+        size, entries = self.store.connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(json_array_length(data)), 0) FROM watchlist_cache WHERE data IS NOT NULL"
+        ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "size": size, "entries": entries}
+
+
+def _build_backend():
+    backend = WATCHLIST_CACHE_BACKEND
+    if backend == "auto":
+        backend = "sqlite" if WEB_CONCURRENCY > 1 else "memory"
+    if backend == "sqlite":
+        return SQLiteBackend()
+    return MemoryBackend()
+
+
+watchlist_cache = _build_backend()
+
+
+def get_watchlist_snapshot(user_id: int, load):
+    '''Return the user's snapshot, calling `load(limit)` on a miss.
+
+    `load` returns `(movie_id, status, created_at)` rows, at most `limit` of them.'''
+    snapshot = watchlist_cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+    loaded_since = time.time()
+    rows = load(WATCHLIST_CACHE_MAX_ENTRIES + 1)
+    if len(rows) > WATCHLIST_CACHE_MAX_ENTRIES:
+        snapshot = WatchlistSnapshot(None)
+    else:
+        snapshot = WatchlistSnapshot({movie_id: (status, created_at) for movie_id, status, created_at in rows})
+    watchlist_cache.set(user_id, snapshot, loaded_since)
+    return snapshot
+
+
+def invalidate_watchlist(user_id: int):
+    '''Drop the user's snapshot after a committed write to their watchlist.'''
+    watchlist_cache.invalidate(user_id)
@@ -0,0 +1,69 @@
+'''Database management commands.
+
+Usage:
+    python -m app.db.cli create-schema   # create missing tables and indexes
+    python -m app.db.cli migrate-logins  # add the token digest columns to an old User_Logins
+    python -m app.db.cli verify          # exit non-zero if expected tables or columns are missing
+    python -m app.db.cli check-plans     # exit non-zero if a hot query does a full table scan
+    python -m app.db.cli reconcile-counts  # recompute Watchlist_Counts from Watchlist'''
+
+import argparse
+import sys
+from app.db.schema import create_schema, migrate_user_logins, missing_columns, missing_tables
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.db.cli", description="Database management commands.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("create-schema", help="create missing tables and indexes")
+    commands.add_parser("migrate-logins", help="migrate User_Logins to token digests")
+    commands.add_parser("verify", help="check that every expected table and column exists")
+    commands.add_parser("check-plans", help="EXPLAIN the hot queries and fail on full table scans")
+    commands.add_parser("reconcile-counts", help="recompute the per-user watchlist counters")
+    args = parser.parse_args(argv)
+
+    if args.command == "create-schema":
+        create_schema()
+        print("Schema created.")
+        return 0
+
+    if args.command == "migrate-logins":
+        backfilled = migrate_user_logins()
+        print(f"User_Logins migrated, {backfilled} token digests backfilled.")
+        return 0
+
+    if args.command == "reconcile-counts":
+        from app.services.maintenance import reconcile_watchlist_counts
+
+        users, fixed = reconcile_watchlist_counts()
+        print(f"Checked {users} users, fixed {fixed} counters.")
+        return 0
+
+    if args.command == "check-plans":
+        from app.db.query_plans import check_query_plans
+
+        failures = check_query_plans()
+        for name, scans in failures.items():
+            print(f"FULL SCAN  {name}")
+            for scan in scans:
+                print(f"    {scan}")
+        if failures:
+            return 1
+        print("Query plans OK.")
+        return 0
+
+    missing = missing_tables()
+    if missing:
+        print(f"Missing tables: {', '.join(sorted(missing))}")
+        return 1
+    columns = missing_columns()
+    if columns:
+        for table, names in sorted(columns.items()):
+            print(f"Missing columns in {table}: {', '.join(names)}")
+        return 1
+    print("Schema OK.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
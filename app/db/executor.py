@@ -0,0 +1,41 @@
+'''Dedicated thread pool for blocking database work.
+
+The routes are `async def`, but the ORM session is synchronous. Calling it
+directly from a route blocks the event loop, so a single worker ends up serving
+one request at a time. Async routes instead hand each service call to `run_db`,
+which runs it on a thread pool reserved for database access. Keeping it apart
+from the default anyio threadpool means DB calls never queue behind other
+blocking work, and sizing it to the connection pool (`DB_EXECUTOR_WORKERS`)
+keeps threads from waiting on a connection checkout.
+
+A session is only ever used by one call at a time: each request awaits its
+`run_db` calls one after the other.'''
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import DB_EXECUTOR_WORKERS
+
+_executor = None
+
+
+def get_db_executor():
+    '''Return the DB thread pool, creating it on first use.'''
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+    return _executor
+
+
+def shutdown_db_executor():
+    '''Stop the DB thread pool; called when the application shuts down.'''
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def run_db(func, *args, **kwargs):
+    '''Run the blocking callable `func(*args, **kwargs)` on the DB thread pool.'''
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), functools.partial(func, *args, **kwargs))
@@ -0,0 +1,168 @@
+'''Connection pool configuration and instrumentation.
+
+`engine_options` turns the `DB_POOL_*` settings into `create_engine` arguments.
+Pooled engines use `InstrumentedQueuePool`, a `QueuePool` that times how long
+each checkout waits for a free connection. SQLAlchemy has no pool event that
+fires before a checkout starts, so the wait cannot be measured with events
+alone. Pool events (`connect`, `checkout`, `checkin`, `invalidate`) keep the
+remaining counters. Each engine has its own `PoolStats`: the primary's is
+`pool_stats`, and every replica engine gets one from `ReplicaSet`. They are
+exported, labelled by engine, on `/metrics` and on the admin `/diagnostics/db`
+endpoint.'''
+
+import threading
+import time
+from collections import deque
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from app.core.config import (
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+)
+
+
+class PoolStats:
+
+    ''' Counters and checkout wait times for one connection pool.'''
+
+    def __init__(self, recent: int = 1024):
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._recent_waits = deque(maxlen=recent)
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            self._recent_waits.append(seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def on_connect(self, *_):
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, *_):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def on_checkin(self, *_):
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def on_invalidate(self, *_):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        '''Return the counters plus p50/p95/max checkout wait in milliseconds.'''
+        with self._lock:
+            waits = sorted(self._recent_waits)
+            stats = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_count": self.wait_count,
+                "wait_seconds_total": self.wait_seconds_total,
+            }
+        stats["wait_ms"] = {
+            "p50": _percentile(waits, 0.50) * 1000,
+            "p95": _percentile(waits, 0.95) * 1000,
+            "max": self.wait_seconds_max * 1000,
+        }
+        return stats
+
+
+def _percentile(ordered, fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+# Stats of the primary engine's pool.
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+
+    ''' QueuePool that records how long each checkout waits for a connection
+    into `stats`, the `PoolStats` of its engine (set by `instrument_pool`).'''
+
+    stats = None
+
+    def _do_get(self):
+        if self.stats is None:
+            return super()._do_get()
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() replaces the pool; the new one keeps recording into the same stats.
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(database_url: str) -> dict:
+    '''`create_engine` keyword arguments for the configured pool settings.'''
+    if _is_memory_sqlite(make_url(database_url)):
+        # In-memory SQLite keeps one connection per thread; there is nothing to size.
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def instrument_pool(engine, stats: PoolStats = pool_stats) -> PoolStats:
+    '''Record the engine's pool activity into `stats`, the primary's by default.'''
+    if isinstance(engine.pool, InstrumentedQueuePool):
+        engine.pool.stats = stats
+    event.listen(engine, "connect", stats.on_connect)
+    event.listen(engine, "checkout", stats.on_checkout)
+    event.listen(engine, "checkin", stats.on_checkin)
+    event.listen(engine, "invalidate", stats.on_invalidate)
+    return stats
+
+
+def pool_settings() -> dict:
+    '''The effective pool settings, for diagnostics.'''
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
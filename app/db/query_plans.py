@@ -0,0 +1,118 @@
+'''Query-plan regression check for the hot query shapes.
+
+`check_query_plans` runs the hot repository queries for real, captures the SQL
+they send, and EXPLAINs each statement. Any plan that reads a whole table
+fails the check. That means `SCAN <table>` on SQLite, and an access type of
+`ALL` or `index` on MySQL. `tests/test_query_plans.py` runs the same check on
+an empty SQLite schema.
+
+Run it against a database with realistic data (see `benchmarks/datagen.py`),
+because MySQL's planner may prefer a full scan on tiny tables:
+
+    python -m app.db.cli check-plans'''
+
+from datetime import datetime
+from sqlalchemy import event, select
+from app.db.schema import load_models
+from app.db.session import SessionLocal, get_engine
+from app.models.user import Movies, Reviews, MovieAvailability, UserActivityLogs
+from app.repositories.user_repository import UserRepository
+from app.repositories.watchlist_repository import WatchlistRepository
+from app.core.revocation import TokenRevocationList
+
+
+def hot_queries():
+    '''(name, callable taking a session) for every query shape that must use an index.'''
+    return (
+        ("watchlist: get_by_user_and_movie", lambda db: WatchlistRepository(db).get_by_user_and_movie(1, 1)),
+        ("watchlist: page", lambda db: WatchlistRepository(db).get_user_watchlist_query(1).limit(10).all()),
+        ("watchlist: page by status", lambda db: WatchlistRepository(db).get_user_watchlist_query(1, "Watched").limit(10).all()),
+        ("watchlist: page after cursor", lambda db: WatchlistRepository(db).get_user_watchlist_query(
+            1, after=(datetime(2024, 1, 1), 1000)).limit(11).all()),
+        ("watchlist: page by movie id", lambda db: WatchlistRepository(db).get_user_watchlist_query(
+            1, sort="movie_id", desc_order=False, after=(10, 1000)).limit(11).all()),
+        ("watchlist: count", lambda db: WatchlistRepository(db).count_user_watchlist(1)),
+        ("watchlist: summary", lambda db: WatchlistRepository(db).summary(1)),
+        ("watchlist: statuses for movie ids", lambda db: WatchlistRepository(db).statuses_for(1, list(range(1, 51)))),
+        ("watchlist: cache load", lambda db: WatchlistRepository(db).watchlist_entries(1, 1001)),
+        ("watchlist: export", lambda db: next(WatchlistRepository(db).export_rows(1, 500), None)),
+        ("watchlist: count by status", lambda db: WatchlistRepository(db).count_by_status(1)),
+        ("watchlist: reconcile counts", lambda db: WatchlistRepository(db).reconcile_counts([1, 2, 3])),
+        ("movies: get_movie", lambda db: WatchlistRepository(db).get_movie(1)),
+        ("user: get_by_email", lambda db: UserRepository(db).get_by_email("user0000001@example.com")),
+        ("user: get_by_id", lambda db: UserRepository(db).get_by_id(1)),
+        ("user_logins: get_login_by_token", lambda db: UserRepository(db).get_login_by_token("token")),
+        ("user_logins: revocation refresh", _refresh_revocations),
+        ("movies: approved, newest first", lambda db: db.execute(
+            select(Movies.id).where(Movies.approved.is_(True)).order_by(Movies.created_at.desc()).limit(20)).all()),
+        ("reviews: by movie", lambda db: db.execute(
+            select(Reviews).where(Reviews.movie_id == 1).limit(20)).all()),
+        ("availability: by movie and region", lambda db: db.execute(
+            select(MovieAvailability).where(MovieAvailability.movie_id == 1, MovieAvailability.region_id == 1)).all()),
+        ("activity: by user, newest first", lambda db: db.execute(
+            select(UserActivityLogs).where(UserActivityLogs.user_id == 1)
+            .order_by(UserActivityLogs.created_at.desc()).limit(20)).all()),
+    )
+
+
+def _refresh_revocations(db):
+    # The first refresh loads unexpired revocations, the second reads past the watermark.
+    revocations = TokenRevocationList()
+    revocations.refresh(db)
+    revocations.refresh(db)
+
+
+def _full_scans(conn, statement, parameters, tables):
+    '''Return the plan lines of `statement` that read a whole table.'''
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        scans = []
+        for row in rows:
+            detail = row[-1]
+            words = detail.split()
+            if words[:1] == ["SCAN"] and len(words) > 1 and words[1] in tables:
+                scans.append(detail)
+        return scans
+
+    rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings().all()
+    return [
+        f"{row['table']}: type={row['type']} key={row['key']}"
+        for row in rows
+        if row.get("table") in tables and row.get("type") in ("ALL", "index")
+    ]
+
+
+def query_full_scans(run, engine=None):
+    '''Run one hot query and return the plan lines of its SELECTs that read a whole table.'''
+    engine = engine or get_engine()
+    tables = set(load_models().tables)
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    db = SessionLocal()
+    try:
+        run(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+        db.rollback()
+        db.close()
+
+    scans = []
+    with engine.connect() as conn:
+        for statement, parameters in captured:
+            scans.extend(_full_scans(conn, statement, parameters, tables))
+    return scans
+
+
+def check_query_plans(engine=None):
+    '''EXPLAIN every hot query; return {name: [full scan plan lines]} for failures.'''
+    failures = {}
+    for name, run in hot_queries():
+        scans = query_full_scans(run, engine)
+        if scans:
+            failures[name] = scans
+    return failures
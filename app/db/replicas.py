@@ -0,0 +1,111 @@
+'''Read-replica selection for read-only sessions.
+
+Sessions created by `ReadSessionLocal` (see `app.db.session`) send their SELECTs
+to one of the engines in `DATABASE_REPLICA_URLS`, picked round-robin. Everything
+else, including any flush, goes to the primary. Two cases send reads to the
+primary instead:
+
+    - read-your-writes: for `READ_YOUR_WRITES_SECONDS` after a user's write
+      commits, that user's reads stay on the primary so replication lag never
+      hides their own change. Writes are tracked per worker.
+    - failure: a replica that raises a disconnect error, or that a session
+      cannot open its connection to, is skipped for `REPLICA_RETRY_SECONDS`.
+      The session that hit the connect error reads from the next replica or
+      from the primary instead (see `AppSession.get_bind`). There is no
+      separate health probe, so choosing a replica costs no round trip.'''
+
+import itertools
+import threading
+import time
+from sqlalchemy import create_engine, event
+from app.core.cache import TTLCache
+from app.core.config import DATABASE_REPLICA_URLS, READ_YOUR_WRITES_SECONDS, REPLICA_RETRY_SECONDS
+from app.core.logger import *
+from app.db.pool import PoolStats, engine_options, instrument_pool
+
+# user_id -> True while the user's last write is within the read-your-writes window
+recent_writers = TTLCache(max_size=100000, ttl=READ_YOUR_WRITES_SECONDS)
+
+
+def mark_write(user_id: int | None):
+    '''Keep `user_id`'s reads on the primary for the read-your-writes window.'''
+    if user_id is not None:
+        recent_writers.set(user_id, True)
+
+
+class ReplicaSet:
+
+    ''' Lazily created replica engines with round-robin selection and health tracking.'''
+
+    def __init__(self, urls, retry_seconds: float = REPLICA_RETRY_SECONDS):
+        self.urls = list(urls)
+        self.retry_seconds = retry_seconds
+        self._engines = None
+        self._stats = {}
+        self._down_until = {}
+        self._cycle = None
+        self._lock = threading.Lock()
+
+    def engines(self):
+        if self._engines is None:
+            with self._lock:
+                if self._engines is None:
+                    engines = [create_engine(url, **engine_options(url)) for url in self.urls]
+                    for engine in engines:
+                        event.listen(engine, "handle_error", self._on_error)
+                        self._stats[engine] = instrument_pool(engine, PoolStats())
+                    self._cycle = itertools.cycle(engines)
+                    self._engines = engines
+        return self._engines
+
+    def _on_error(self, context):
+        if context.is_disconnect and context.engine is not None:
+            self.mark_down(context.engine, context.original_exception)
+
+    def mark_down(self, engine, error=None):
+        self._down_until[engine] = time.monotonic() + self.retry_seconds
+        events.warning(
+            "Replica Marked Down",
+            replica=engine.url.render_as_string(hide_password=True),
+            retry_seconds=self.retry_seconds,
+            error=str(error),
+        )
+
+    def _healthy(self, engine) -> bool:
+        return self._down_until.get(engine, 0) <= time.monotonic()
+
+    def choose(self, user_id: int | None = None):
+        '''Return the next replica engine not marked down, or None to read from the primary.'''
+        if not self.urls:
+            return None
+        if user_id is not None and recent_writers.get(user_id) is not None:
+            return None
+
+        engines = self.engines()
+        for _ in range(len(engines)):
+            with self._lock:
+                engine = next(self._cycle)
+            if self._healthy(engine):
+                return engine
+        return None
+
+    def pools(self):
+        '''`(label, engine, PoolStats)` for each replica engine created so far,
+        labelled `replica-<n>` in `DATABASE_REPLICA_URLS` order.'''
+        return [(f"replica-{n}", engine, self._stats[engine]) for n, engine in enumerate(self._engines or [])]
+
+    def status(self):
+        '''Replica URLs (without passwords), whether each is currently used, and its pool stats.'''
+        now = time.monotonic()
+        return [
+            {
+                "engine": label,
+                "url": engine.url.render_as_string(hide_password=True),
+                "healthy": self._down_until.get(engine, 0) <= now,
+                "stats": stats.snapshot(),
+            }
+            for label, engine, stats in self.pools()
+        ]
+
+
+replica_set = ReplicaSet(DATABASE_REPLICA_URLS)
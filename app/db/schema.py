@@ -0,0 +1,157 @@
+'''Explicit schema management.
+
+Creating tables is a deployment step (`python -m app.db.cli create-schema`), not
+something every worker does while importing. At startup a worker can optionally
+compare the tables and columns it expects with the ones that exist, which costs
+a few catalog queries (`DB_SCHEMA_CHECK`).
+
+`create_schema` only adds tables and indexes. Columns added to an existing table
+need a migration; `migrate_user_logins` is the one for `User_Logins`
+(`python -m app.db.cli migrate-logins`).'''
+
+import hashlib
+from sqlalchemy import Index, MetaData, Table, inspect, text
+from app.core.config import DB_SCHEMA_CHECK
+from app.core.logger import *
+from app.db.session import Base, get_engine
+
+
+def load_models():
+    '''Import every model module so `Base.metadata` knows all tables.'''
+    import app.models.user  # noqa: F401
+    import app.models.watchlist  # noqa: F401
+    return Base.metadata
+
+
+def expected_tables() -> set:
+    return set(load_models().tables)
+
+
+def missing_tables(engine=None) -> set:
+    '''Expected tables that do not exist in the database (one catalog query).'''
+    engine = engine or get_engine()
+    existing = set(inspect(engine).get_table_names())
+    return expected_tables() - existing
+
+
+def missing_columns(engine=None) -> dict:
+    '''Expected columns that do not exist, by table, for the tables that do exist.'''
+    engine = engine or get_engine()
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = {}
+    for name, table in load_models().tables.items():
+        if name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(name)}
+        columns = sorted(set(table.columns.keys()) - existing)
+        if columns:
+            missing[name] = columns
+    return missing
+
+
+def create_schema(engine=None):
+    '''Create every missing table, and every missing index on existing tables.'''
+    engine = engine or get_engine()
+    metadata = load_models()
+    missing = missing_columns(engine)
+    if missing:
+        # An index on a column that is not there yet would fail half way through.
+        raise RuntimeError(f"Missing columns: {_describe(missing)}; run `python -m app.db.cli migrate-logins`")
+    metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add indexes declared since.
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def migrate_user_logins(engine=None, batch_size: int = 1000) -> int:
+    '''Bring a `User_Logins` table created before token digests up to date.
+
+    Adds `token_digest`, `jti` and `revoked_at` where missing, fills
+    `token_digest` from the legacy raw `token` column and then drops that
+    column, deletes rows that still have no digest (those sessions can no
+    longer be logged out), and builds the unique index on `token_digest`.
+    Running it again is a no-op. Returns the number of rows backfilled.'''
+    engine = engine or get_engine()
+    logins = load_models().tables["User_Logins"]
+    backfilled = 0
+    with engine.begin() as conn:
+        quote = conn.dialect.identifier_preparer.quote
+        table = quote(logins.name)
+        existing = {column["name"] for column in inspect(conn).get_columns(logins.name)}
+        for name in ("token_digest", "jti", "revoked_at"):
+            if name not in existing:
+                column_type = logins.c[name].type.compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {quote(name)} {column_type} NULL"))
+
+        if "token" in existing:
+            while True:
+                rows = conn.execute(
+                    text(f"SELECT id, token FROM {table} WHERE token_digest IS NULL AND token IS NOT NULL LIMIT :n"),
+                    {"n": batch_size},
+                ).all()
+                if not rows:
+                    break
+                conn.execute(
+                    text(f"UPDATE {table} SET token_digest = :digest WHERE id = :id"),
+                    [{"id": row.id, "digest": hashlib.sha256(row.token.encode()).hexdigest()} for row in rows],
+                )
+                backfilled += len(rows)
+            # New rows carry no raw token, so the NOT NULL column has to go, with its indexes.
+            legacy = Table(logins.name, MetaData(), autoload_with=conn)
+            for index in legacy.indexes:
+                if "token" in index.columns:
+                    index.drop(conn)
+            conn.execute(text(f"ALTER TABLE {table} DROP COLUMN token"))
+
+        deleted = conn.execute(text(f"DELETE FROM {table} WHERE token_digest IS NULL")).rowcount
+        if conn.dialect.name == "mysql":
+            conn.execute(text(f"ALTER TABLE {table} MODIFY token_digest CHAR(64) NOT NULL"))
+        if not _has_unique_index(conn, logins.name, "token_digest"):
+            Index("uq_user_logins_token_digest", logins.c.token_digest, unique=True).create(conn)
+
+    create_schema(engine)
+    events.info("User_Logins Migrated", backfilled=backfilled, deleted=deleted)
+    return backfilled
+
+
+def _has_unique_index(conn, table: str, column: str) -> bool:
+    inspector = inspect(conn)
+    unique = [index["column_names"] for index in inspector.get_indexes(table) if index["unique"]]
+    unique += [constraint["column_names"] for constraint in inspector.get_unique_constraints(table)]
+    return [column] in unique
+
+
+def _describe(missing_columns: dict) -> str:
+    return "; ".join(f"{table}({', '.join(columns)})" for table, columns in sorted(missing_columns.items()))
+
+
+def check_schema(mode: str = DB_SCHEMA_CHECK):
+    '''Startup check: log missing tables and columns, or refuse to start when `mode` is "fail".'''
+    if mode == "off":
+        return
+    try:
+        tables = missing_tables()
+        columns = missing_columns()
+    except Exception as e:
+        if mode == "fail":
+            raise
+        events.warning("Schema Check Failed", error=str(e))
+        return
+    if tables:
+        events.warning(
+            "Schema Incomplete",
+            missing_tables=sorted(tables),
+            hint="run `python -m app.db.cli create-schema`",
+        )
+    if columns:
+        events.warning(
+            "Schema Outdated",
+            missing_columns=_describe(columns),
+            hint="run `python -m app.db.cli migrate-logins`",
+        )
+    if mode == "fail" and tables:
+        raise RuntimeError(f"Missing tables: {', '.join(sorted(tables))}")
+    if mode == "fail" and columns:
+        raise RuntimeError(f"Missing columns: {_describe(columns)}")
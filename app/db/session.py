@@ -1,34 +1,162 @@
 '''It sets up the database engine using the configured `database_url`, provides a session factory
 (`SessionLocal`) for creating transactional database sessions, and defines a dependency function
-(`get_db`) that integrates cleanly with FastAPI's dependency injection system.'''
+(`get_db`) that integrates cleanly with FastAPI's dependency injection system.
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+Importing this module never touches the database: the engine is created on first use
+by `get_engine()`, and the schema is managed explicitly with `python -m app.db.cli`
+instead of being created at import time.
+
+Read-only endpoints use `get_read_db`, whose sessions may read from a replica (see
+`app.db.replicas`); everything else uses `get_db` and the primary.'''
+
+import threading
+from fastapi import Request
+from sqlalchemy import create_engine, event, Select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from app.core.config import database_url
+from app.db.pool import engine_options, instrument_pool
+from app.db.replicas import replica_set, mark_write
 
 '''Components:
-    - **engine**: SQLAlchemy Engine instance used to interact with the database.
-    - **SessionLocal**: Session factory for creating database sessions.
+    - **get_engine**: Returns the SQLAlchemy Engine, creating it on first use, with the
+      connection pool configured and instrumented by `app.db.pool`. `engine` is kept as
+      a lazily resolved module attribute for existing imports.
+    - **SessionLocal**: Session factory for creating database sessions on the primary.
+    - **ReadSessionLocal**: Session factory for read-only sessions that may use a replica.
     - **Base**: Declarative base for defining ORM models.
-    - **get_db**: Dependency function that provides a scoped database session to API routes.'''
+    - **get_db** / **get_read_db**: Dependency functions that provide the request's database
+      session to API routes (see `request_session`).'''
 
-engine=create_engine(database_url)
-SessionLocal=sessionmaker(autocommit=False,autoflush=False,bind=engine)
+_engine = None
+_engine_lock = threading.Lock()
 
-# Dependency
-def get_db():
-    db = SessionLocal()
+
+def get_engine():
+    '''Return the process-wide engine, creating it on first use.'''
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(database_url, **engine_options(database_url))
+                instrument_pool(engine)
+                _engine = engine
+    return _engine
+
+
+def __getattr__(name):
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class AppSession(Session):
+
+    ''' Session bound to the lazily created engine.
+
+    Sessions with `info["read_only"]` send SELECTs to a replica chosen once per
+    session; `info["user_id"]` is the user whose reads and writes it carries.'''
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        primary = get_engine()
+        if not self.info.get("read_only") or self._flushing or not isinstance(clause, Select):
+            return primary
+        bind = self.info.get("read_bind")
+        if bind is None:
+            bind = self.info["read_bind"] = self._connect_replica() or primary
+        return bind
+
+    def _connect_replica(self):
+        '''Open this session's connection on a replica and return its engine.
+
+        The connection is the one the session's first query runs on, so there
+        is no extra checkout. A replica that cannot be reached is marked down
+        and the next one is tried; None means read from the primary.'''
+        while True:
+            engine = replica_set.choose(self.info.get("user_id"))
+            if engine is None:
+                return None
+            try:
+                self.connection(bind_arguments={"bind": engine})
+            except DBAPIError as e:
+                replica_set.mark_down(engine, e)
+                continue
+            return engine
+
+
+@event.listens_for(AppSession, "after_flush")
+def _record_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(AppSession, "after_commit")
+def _start_read_your_writes(session):
+    if session.info.pop("wrote", False):
+        mark_write(session.info.get("user_id"))
+
+
+# expire_on_commit=False: objects stay loaded after the unit of work commits (see app.db.unit_of_work)
+SessionLocal=sessionmaker(class_=AppSession,autocommit=False,autoflush=False,expire_on_commit=False)
+ReadSessionLocal=sessionmaker(class_=AppSession,autocommit=False,autoflush=False,expire_on_commit=False,info={"read_only": True})
+
+
+def read_session(user_id: int | None = None):
+    '''Open a read-only session on behalf of `user_id`.'''
+    return ReadSessionLocal(info={"user_id": user_id})
+
+
+def request_session(state: dict, user_id: int | None = None, read_only: bool = False):
+    '''Return the request's session of the given kind, creating it on first use.
+
+    `state` is the ASGI scope state; `DBSessionMiddleware` prepares it and closes
+    the sessions once the response has been sent. Creating a session does not
+    check out a connection: that only happens on its first query.'''
+    sessions = state["db_sessions"]
+    db = sessions.get(read_only)
+    if db is None:
+        db = read_session(user_id) if read_only else SessionLocal(info={"user_id": user_id})
+        sessions[read_only] = db
+    return db
+
+
+def close_request_sessions(sessions: dict):
+    '''Close every session opened for a request.'''
+    while sessions:
+        _, db = sessions.popitem()
+        db.close()
+
+
+def _request_user_id(request: Request):
+    user = getattr(request.state, "user", None)
+    return getattr(user, "id", None)
+
+
+def _session_dependency(request: Request, read_only: bool):
+    state = request.scope.get("state")
+    if state is not None and "db_sessions" in state:
+        # Shared with the middleware and closed by DBSessionMiddleware.
+        yield request_session(state, _request_user_id(request), read_only)
+        return
+    db = read_session(_request_user_id(request)) if read_only else SessionLocal(info={"user_id": _request_user_id(request)})
     try:
         yield db
     finally:
         db.close()
+
+
+# Dependency
+def get_db(request: Request):
+    yield from _session_dependency(request, read_only=False)
+
+
+def get_read_db(request: Request):
+    '''Dependency for read-only endpoints; reads may be served by a replica.'''
+    yield from _session_dependency(request, read_only=True)
         
 #base class
 
 '''The SQLAlchemy `Base` class serves as the declarative base for defining ORM models.
-All database tables mapped to these models can be created automatically via `Base.metadata.create_all()'''
+Tables are created with `python -m app.db.cli create-schema`, see `app.db.schema`.'''
 
 Base=declarative_base()
-
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
@@ -0,0 +1,43 @@
+'''Transaction boundaries for service calls.
+
+Repositories only stage changes and `flush()`; they never commit. A service
+method wraps its work in a `UnitOfWork`, which commits once when the block
+exits normally and rolls back if it raises:
+
+    with UnitOfWork(self.db):          # sync services, already on a DB thread
+        ...
+
+    async with UnitOfWork(self.db):    # async services; commit runs via run_db
+        ...
+
+Sessions are created with `expire_on_commit=False`, and the columns the
+services read back after a write (`created_at`, `status`, `updated_at`) have
+Python-side defaults, so nothing has to be re-selected after the flush or
+the commit.'''
+
+from app.db.executor import run_db
+
+
+class UnitOfWork:
+
+    ''' Commits the session once on success, rolls it back on error.'''
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.db.commit()
+        else:
+            self.db.rollback()
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await run_db(self.__exit__, exc_type, exc, tb)
+        return False
@@ -1,12 +1,12 @@
 from fastapi import Request
 from fastapi.responses import JSONResponse
 from app.exceptions.custom_exceptions import WatchlistBaseException
-from app.core.logger import logger
+from app.core.logger import events
 
 
 async def watchlist_exception_handler(request: Request, exc: WatchlistBaseException):
     """Handle all WatchlistBaseException subclasses uniformly."""
-    logger.warning(f"Watchlist error: {exc.detail} | Path: {request.url.path}")
+    events.warning("Watchlist Error", detail=exc.detail, path=request.url.path)
     return JSONResponse(
         status_code=exc.status_code,
         content={
@@ -1,25 +1,84 @@
 '''This is the entry point of the FastAPI application.
 
-It initializes the FastAPI app instance, sets up the database tables,
-attaches middleware for authentication, and includes versioned API routers
-for modular route management.'''
+It initializes the FastAPI app instance, attaches middleware for authentication,
+and includes versioned API routers for modular route management. Database tables
+are not created here; see `python -m app.db.cli`.'''
 
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.db.session import engine, Base
 from app.api.v1 import auth
 from app.api.v1 import watchlist
+from app.api.v1 import metrics as metrics_api
+from app.api.v1 import diagnostics
 from app.middleware.middleware import AuthMiddleware
+from app.middleware.db_session import DBSessionMiddleware
+from app.core.metrics import MetricsMiddleware, run_metrics_flusher, remove_snapshot
+from app.core.config import METRICS_MULTIPROC_DIR, WATCHLIST_COUNTS_RECONCILE_INTERVAL_SECONDS
 from app.exceptions.custom_exceptions import WatchlistBaseException
 from app.exceptions.handlers import watchlist_exception_handler
-# Create tables
-Base.metadata.create_all(bind=engine)
+from app.core.revocation import refresh_revocations, run_revocation_refresher
+from app.core.hashing import get_executor, shutdown_executor
+from app.db.executor import get_db_executor, shutdown_db_executor
+from app.services.maintenance import run_login_purger, run_watchlist_count_reconciler
+from app.db.schema import check_schema
+from app.core.logger import *
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    '''Start and stop per-worker background tasks.'''
+    startup_started = time.perf_counter()
+    await asyncio.to_thread(check_schema)
+    try:
+        await asyncio.to_thread(refresh_revocations)
+    except Exception as e:
+        # Start anyway; the refresher below retries every few seconds.
+        events.warning("Initial Revocation Refresh Failed", error=str(e))
+    refresher = asyncio.create_task(run_revocation_refresher())
+    purger = asyncio.create_task(run_login_purger())
+    reconciler = (
+        asyncio.create_task(run_watchlist_count_reconciler()) if WATCHLIST_COUNTS_RECONCILE_INTERVAL_SECONDS > 0 else None
+    )
+    flusher = asyncio.create_task(run_metrics_flusher()) if METRICS_MULTIPROC_DIR else None
+    get_executor()
+    get_db_executor()
+    events.info(
+        "Worker Started",
+        pid=os.getpid(),
+        import_ms=round(_import_ms, 1),
+        startup_ms=round((time.perf_counter() - startup_started) * 1000, 1),
+    )
+    try:
+        yield
+    finally:
+        refresher.cancel()
+        purger.cancel()
+        if reconciler:
+            reconciler.cancel()
+        if flusher:
+            flusher.cancel()
+            remove_snapshot()
+        await asyncio.to_thread(shutdown_executor)
+        await asyncio.to_thread(shutdown_db_executor)
 
-app = FastAPI(title="User & Watchlist API")
 
-# add middleware
+app = FastAPI(title="User & Watchlist API", lifespan=lifespan)
+
+# add middleware (the last one added runs first, so metrics also see auth failures)
 app.add_middleware(AuthMiddleware)
+app.add_middleware(DBSessionMiddleware)
+app.add_middleware(MetricsMiddleware, router=app.router)
 
 # Include versioned API routers
 app.include_router(auth.router, tags=["Users and Auth"])
 app.include_router(watchlist.router, tags=["Users Watchlist"])
-app.add_exception_handler(WatchlistBaseException, watchlist_exception_handler)
\ No newline at end of file
+app.include_router(metrics_api.router, tags=["Metrics"])
+app.include_router(diagnostics.router, tags=["Diagnostics"])
+app.add_exception_handler(WatchlistBaseException, watchlist_exception_handler)
+
+_import_ms = (time.perf_counter() - _import_started) * 1000
@@ -0,0 +1,29 @@
+'''Middleware that scopes database sessions to a request.
+
+It prepares an empty session registry in the ASGI scope state. The auth
+middleware, `get_db`/`get_read_db` and therefore the services all take their
+session from it through `app.db.session.request_session`, so a request uses at
+most one primary and one read session, created only when first needed. Once the
+response has been sent, whatever sessions were opened are closed on the DB
+thread pool, returning their connections.'''
+
+from app.db.executor import run_db
+from app.db.session import close_request_sessions
+
+
+class DBSessionMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sessions = scope.setdefault("state", {})["db_sessions"] = {}
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if sessions:
+                await run_db(close_request_sessions, sessions)
@@ -2,78 +2,127 @@
 
    This middleware intercepts all incoming HTTP requests before they reach the route handlers.
    It validates the presence and correctness of a Bearer token in the `Authorization` header,
-   verifies the JWT, and attaches the authenticated user to the request state.'''
+   verifies the JWT, and attaches the authenticated user to the request state.
 
-from fastapi import FastAPI,Request
+   It is written as a plain ASGI middleware rather than a `BaseHTTPMiddleware` so that
+   responses (including streaming responses and background tasks) pass through untouched.
+   It must run inside `DBSessionMiddleware`: on a user-cache miss the user is loaded with
+   the request's session, which the route then reuses.'''
+
+import re
 from app.core.security import verify_jwt
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from app.db.session import SessionLocal
-from app.models.user import User
+from app.db.session import request_session
+from app.core.user_cache import load_user, user_cache
+from app.db.executor import run_db
 from app.core.logger import *
 
-class AuthMiddleware(BaseHTTPMiddleware):
+EXEMPT_PATHS = (
+    "/auth/register",
+    "/auth/login",
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+    "/auth/streaming",
+    "/metrics"
+)
+
+# POST routes that only read; like GET, their user lookup uses the read session the route will use.
+READ_ONLY_POST_PATHS = frozenset((
+    "/watchlist/check",
+))
+
+# Single precompiled alternation of all exempt prefixes, longest first.
+_EXEMPT_PREFIX = re.compile(
+    "|".join(re.escape(path) for path in sorted(EXEMPT_PATHS, key=len, reverse=True))
+)
+
+
+def is_exempt_path(path: str) -> bool:
+    '''Return True if `path` starts with one of the `EXEMPT_PATHS` prefixes.'''
+    return _EXEMPT_PREFIX.match(path) is not None
+
+
+def is_read_only(method: str, path: str) -> bool:
+    '''Return True if the route serving `method` `path` reads through `get_read_db`.'''
+    return method in ("GET", "HEAD") or (method == "POST" and path in READ_ONLY_POST_PATHS)
 
-    async def dispatch(self, request: Request, call_next):
+
+class AuthMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
 
         '''Args:
-            request (Request): The incoming HTTP request.
-            call_next (Callable): The next middleware or route handler in the chain.
+            scope (dict): The ASGI connection scope.
+            receive (Callable): The ASGI receive channel.
+            send (Callable): The ASGI send channel.
 
         Returns:
-            JSONResponse | Response:
+            None. Sends either:
                 - `401 Unauthorized` if the request lacks valid authentication.
                 - The original route response if authentication succeeds.'''
 
-        EXEMPT_PATHS = (
-            "/auth/register",
-            "/auth/login",
-            "/docs",
-            "/redoc",
-            "/openapi.json",
-            "/auth/streaming"
-        )
-
-        if any(request.url.path.startswith(path) for path in EXEMPT_PATHS):
-            logger.debug({
-                "event": "Auth Skipped (Exempt Path)",
-                "path": request.url.path,
-                "method": request.method,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC"),
-            })
-            return await call_next(request)
-
-        auth_header = request.headers.get("Authorization")
-        request.state.user = None  # default
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if is_exempt_path(path):
+            events.debug(
+                "Auth Skipped (Exempt Path)",
+                path=path,
+                method=scope["method"],
+            )
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        state["user"] = None  # default
+
+        auth_header = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                auth_header = value.decode("latin-1")
+                break
 
         if not auth_header or not auth_header.startswith("Bearer "):
-            logger.warning({
-                "event": "Authorization Failed",
-                "path": request.url.path,
-                "reason": "Missing or invalid Authorization header",
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC"),
-            })
-            return JSONResponse(status_code=401, content={"detail": "Invalid authorization"})
+            events.warning(
+                "Authorization Failed",
+                path=path,
+                reason="Missing or invalid Authorization header",
+            )
+            response = JSONResponse(status_code=401, content={"detail": "Invalid authorization"})
+            await response(scope, receive, send)
+            return
 
         token = auth_header.split(" ")[1]
         payload = verify_jwt(token)
         if not payload:
-            logger.warning({
-                "event": "Authorization Failed",
-                "path": request.url.path,
-                "reason": "Invalid or expired token",
-                "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
-            })
-            return JSONResponse(status_code=401, content={"detail": "Invalid or expired token"})
-
-        db = SessionLocal()
-        try:
-            user = db.query(User).filter(User.id == payload.get("user_id")).first()
-            request.state.user = user
-        finally:
-            db.close()
+            events.warning(
+                "Authorization Failed",
+                path=path,
+                reason="Invalid or expired token",
+            )
+            response = JSONResponse(status_code=401, content={"detail": "Invalid or expired token"})
+            await response(scope, receive, send)
+            return
+
+        user_id = payload.get("user_id")
+        user = user_cache.get(user_id)
+        if user is None:
+            # Cache miss: load the user off the event loop, with the request's
+            # session so the route reuses it (reads may go to a replica).
+            read_only = is_read_only(scope["method"], path)
+            db = request_session(state, user_id, read_only=read_only)
+            user = await run_db(load_user, db, user_id)
+        state["user"] = user
 
         if not user:
-            return JSONResponse(status_code=401, content={"detail": "User not found"})
+            response = JSONResponse(status_code=401, content={"detail": "User not found"})
+            await response(scope, receive, send)
+            return
 
-        return await call_next(request)
\ No newline at end of file
+        await self.app(scope, receive, send)
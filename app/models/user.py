@@ -1,12 +1,19 @@
 from sqlalchemy import (
-    Column, Integer, BigInteger, String, Text, Float, Boolean, Enum, TIMESTAMP, Date,
-    ForeignKey, text
+    Column, Integer, BigInteger, String, CHAR, Text, Float, Boolean, Enum, TIMESTAMP, Date,
+    ForeignKey, Index, text
 )
+from datetime import datetime, timezone
 from sqlalchemy.orm import relationship
 from app.db.session import Base
-from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+
+def utc_now() -> datetime:
+    '''Naive UTC time truncated to seconds, matching what a TIMESTAMP column stores.
+
+    Used as a Python-side default so the value is known after a flush without
+    reading it back; PyMySQL has no RETURNING, so server defaults would cost a
+    SELECT per write.'''
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
 
 # ----------------- User -----------------
 class User(Base):
@@ -15,12 +22,12 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(100), unique=True, nullable=False)
     email = Column(String(255), unique=True, nullable=False)
-    role = Column(Enum('admin', 'user'), server_default='user')
+    role = Column(Enum('admin', 'user'), default='user', server_default='user')
     password = Column(String(100), nullable=False)
-    status = Column(Enum('active', 'suspended'), server_default='active')
-    created_at = Column(TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'))
-    updated_at = Column(TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'),
-                        onupdate=text('CURRENT_TIMESTAMP'))
+    status = Column(Enum('active', 'suspended'), default='active', server_default='active')
+    created_at = Column(TIMESTAMP, default=utc_now, server_default=text('CURRENT_TIMESTAMP'))
+    updated_at = Column(TIMESTAMP, default=utc_now, server_default=text('CURRENT_TIMESTAMP'),
+                        onupdate=utc_now)
 
     movies_created = relationship(
         "Movies", back_populates="creator",
@@ -47,25 +54,31 @@ class User(Base):
         cascade="all, delete-orphan", passive_deletes=True
     )
 
-    def verify_password(self, plain_password: str) -> bool:
-        return pwd_context.verify(plain_password, self.password)
-
 # ----------------- UserLogins -----------------
 class UserLogins(Base):
     __tablename__ = "User_Logins"
+    __table_args__ = (
+        Index("ix_user_logins_user_id_status", "user_id", "status"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), nullable=False)
-    token = Column(String(255), unique=True, nullable=False)
+    # SHA-256 hex digest of the JWT; the raw token is never stored.
+    token_digest = Column(CHAR(64), unique=True, nullable=False)
+    jti = Column(String(32))
     status = Column(Enum('active', 'suspended'), server_default='active')
     created_at = Column(TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'))
-    expiration_date = Column(TIMESTAMP)
+    expiration_date = Column(TIMESTAMP, index=True)
+    revoked_at = Column(TIMESTAMP, index=True)
 
     user = relationship("User", back_populates="logins", passive_deletes=True)
 
 # ----------------- Movies -----------------
 class Movies(Base):
     __tablename__ = "Movies"
+    __table_args__ = (
+        Index("ix_movies_approved_created_at", "approved", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     title = Column(String(255), nullable=False)
@@ -97,6 +110,9 @@ class Movies(Base):
 # ----------------- Reviews -----------------
 class Reviews(Base):
     __tablename__ = "Reviews"
+    __table_args__ = (
+        Index("ix_reviews_movie_id", "movie_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     movie_id = Column(BigInteger, ForeignKey("Movies.id", ondelete="CASCADE"), nullable=False)
@@ -155,6 +171,9 @@ class Regions(Base):
 # ----------------- Movie_Availability -----------------
 class MovieAvailability(Base):
     __tablename__ = "Movie_Availability"
+    __table_args__ = (
+        Index("ix_movie_availability_movie_id_region_id", "movie_id", "region_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     movie_id = Column(BigInteger, ForeignKey("Movies.id", ondelete="CASCADE"), nullable=False)
@@ -175,6 +194,9 @@ class MovieAvailability(Base):
 # ----------------- User_Activity_Logs -----------------
 class UserActivityLogs(Base):
     __tablename__ = "User_Activity_Logs"
+    __table_args__ = (
+        Index("ix_user_activity_logs_user_id_created_at", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(BigInteger, ForeignKey("User.id", ondelete="CASCADE"), nullable=False)
@@ -1,19 +1,45 @@
 from sqlalchemy import (
     Column, Integer, BigInteger, String, Text, Float, Boolean, Enum, TIMESTAMP, Date,
-    ForeignKey, text
+    ForeignKey, Index, text
 )
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from app.db.session import Base
+from app.models.user import utc_now
+
+# SQLite keeps CURRENT_TIMESTAMP as "YYYY-MM-DD HH:MM:SS"; bind datetimes in the
+# same text format so keyset comparisons on created_at line up with stored rows.
+SQLITE_TIMESTAMP = sqlite.DATETIME(
+    storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+)
 
 
 class Watchlist(Base):
     __tablename__ = "Watchlist"
+    __table_args__ = (
+        Index("ix_watchlist_user_id_movie_id", "user_id", "movie_id"),
+        Index("ix_watchlist_user_id_created_at", "user_id", "created_at"),
+        Index("ix_watchlist_user_id_status_created_at", "user_id", "status", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(BigInteger, ForeignKey("User.id", ondelete="CASCADE"), nullable=False)
     movie_id = Column(BigInteger, ForeignKey("Movies.id", ondelete="CASCADE"), nullable=False)
-    created_at = Column(TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'))
-    status = Column(Enum('To Watch', 'Watched'), server_default='To Watch')
+    created_at = Column(TIMESTAMP().with_variant(SQLITE_TIMESTAMP, "sqlite"), default=utc_now,
+                        server_default=text('CURRENT_TIMESTAMP'))
+    status = Column(Enum('To Watch', 'Watched'), default='To Watch', server_default='To Watch')
 
     user = relationship("User", back_populates="watchlist", passive_deletes=True)
-    movie = relationship("Movies", back_populates="watchlist", passive_deletes=True)
\ No newline at end of file
+    movie = relationship("Movies", back_populates="watchlist", passive_deletes=True)
+
+
+class WatchlistCounts(Base):
+    '''Per-user watchlist counters, kept in step with `Watchlist` by the
+    repository's write methods and corrected by the reconciliation job.'''
+
+    __tablename__ = "Watchlist_Counts"
+
+    user_id = Column(BigInteger, ForeignKey("User.id", ondelete="CASCADE"), primary_key=True, autoincrement=False)
+    total = Column(Integer, nullable=False, server_default=text("0"))
+    to_watch = Column(Integer, nullable=False, server_default=text("0"))
+    watched = Column(Integer, nullable=False, server_default=text("0"))
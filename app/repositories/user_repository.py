@@ -1,8 +1,10 @@
 '''The repository handles all CRUD(Create, Read, Update, Delete) 
 operations and returns data models or schemas to user services.'''
 
+from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from app.models.user import User,UserLogins
+from app.core.security import token_digest
 
 class UserRepository:
 
@@ -13,21 +15,34 @@ class UserRepository:
 
     def get_login_by_token(self, token: str):
         '''fetch login record with the help of token'''
-        return self.db.query(UserLogins).filter(UserLogins.token == token).first()
+        return self.db.query(UserLogins).filter(UserLogins.token_digest == token_digest(token)).first()
     
     def save_login(self, user_login: UserLogins):
         '''save new login record in UserLogins'''
         self.db.add(user_login)
-        self.db.commit()
-        self.db.refresh(user_login)
+        self.db.flush()
         return user_login
     
     def update_login(self, login_record: UserLogins):
         '''update the login status when user loggedout'''
-        self.db.commit()
-        self.db.refresh(login_record)
+        self.db.flush()
         return login_record
 
+    def purge_expired_logins(self, batch_size: int):
+        '''delete up to `batch_size` expired login records, oldest first'''
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        ids = [
+            row.id for row in
+            self.db.query(UserLogins.id)
+            .filter(UserLogins.expiration_date < now)
+            .order_by(UserLogins.expiration_date)
+            .limit(batch_size)
+        ]
+        if not ids:
+            return 0
+        self.db.query(UserLogins).filter(UserLogins.id.in_(ids)).delete(synchronize_session=False)
+        return len(ids)
+
     def get_by_email(self, email: str):
         '''fetch the user with a given email'''
         return self.db.query(User).filter(User.email == email).first()
@@ -39,20 +54,18 @@ class UserRepository:
     def create(self, user: User):
         '''create a new user'''
         self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        self.db.flush()
         return user
 
     def update(self, user: User):
         '''update the existing user'''
-        self.db.commit()
-        self.db.refresh(user)
+        self.db.flush()
         return user
 
     def delete(self, user: User):
         '''delete an existing user'''
         self.db.delete(user)
-        self.db.commit()
+        self.db.flush()
         return user
 
     def list(self):
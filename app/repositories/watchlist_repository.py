@@ -1,9 +1,22 @@
 '''This module contains the repository classes and functions responsible for
 interacting with the alchemy models.'''
 
+from collections import Counter
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.models.user import Movies
-from app.models.watchlist import Watchlist  
+from app.models.watchlist import Watchlist, WatchlistCounts
+
+# Sort keys accepted by the watchlist listing. Each one is served in order by an
+# index on (user_id, <key>), whose implicit primary key suffix breaks ties by id.
+SORT_COLUMNS = {
+    "created_at": Watchlist.created_at,
+    "movie_id": Watchlist.movie_id,
+}
+
+# Watchlist status -> WatchlistCounts column
+STATUS_COUNTERS = {"To Watch": "to_watch", "Watched": "watched"}
 
 class WatchlistRepository:
     ''' Repository class for performing CRUD operations on Watchlist,Movies entities'''
@@ -15,8 +28,11 @@ class WatchlistRepository:
         ''' fetch movies with the help of movie_id'''
         return self.db.query(Movies).filter_by(id=movie_id).first()
     
-    def get_user_watchlist_query(self, user_id: int, status: str = None, sort: str = "created_at", desc_order: bool = True):
-        '''fetch a query object  with the help of user_id and movie_id'''
+    def get_user_watchlist_query(self, user_id: int, status: str = None, sort: str = "created_at", desc_order: bool = True, after=None):
+        '''fetch a query object for a user's watchlist ordered by `sort`, then id.
+
+        `after` is the `(sort value, id)` of the last row already returned; the
+        query then seeks past it instead of counting rows with OFFSET.'''
         query = (
             self.db.query(Watchlist, Movies.title.label("movie_title"))
             .join(Movies, Watchlist.movie_id == Movies.id)
@@ -26,12 +42,45 @@ class WatchlistRepository:
         if status:
             query = query.filter(Watchlist.status == status)
 
-      
-        sort_attr = getattr(Watchlist, sort)
-        query = query.order_by(sort_attr.desc() if desc_order else sort_attr)
+        sort_attr = SORT_COLUMNS[sort]
+        if after is not None:
+            value, row_id = after
+            # The redundant bound on sort_attr alone lets the planner seek the index.
+            if desc_order:
+                query = query.filter(sort_attr <= value, or_(sort_attr < value, Watchlist.id < row_id))
+            else:
+                query = query.filter(sort_attr >= value, or_(sort_attr > value, Watchlist.id > row_id))
+
+        if desc_order:
+            query = query.order_by(sort_attr.desc(), Watchlist.id.desc())
+        else:
+            query = query.order_by(sort_attr, Watchlist.id)
 
         return query
+
+    def count_user_watchlist(self, user_id: int, status: str = None):
+        '''Count a user's watchlist rows, optionally for one status.'''
+        if status is None or status in STATUS_COUNTERS:
+            counts = self.summary(user_id)
+            return counts["total_movies"] if status is None else counts[STATUS_COUNTERS[status]]
+        return 0
     
+    def export_rows(self, user_id: int, batch_size: int):
+        '''Yield a user's whole watchlist joined with movie titles, newest first,
+        as lists of at most `batch_size` rows.
+
+        `yield_per` streams the result through a server-side cursor, so only one
+        batch is held in memory however long the watchlist is.'''
+        statement = (
+            select(Watchlist.id, Watchlist.movie_id, Movies.title.label("movie_title"), Watchlist.status, Watchlist.created_at)
+            .join(Movies, Watchlist.movie_id == Movies.id)
+            .where(Watchlist.user_id == user_id)
+            .order_by(Watchlist.created_at.desc(), Watchlist.id.desc())
+            .execution_options(yield_per=batch_size)
+        )
+        with self.db.execute(statement) as result:
+            yield from result.partitions()
+
     def get_by_user_and_movie(self, user_id: int, movie_id: int):
         """Fetch a specific watchlist entry for a given user and movie."""
         return (
@@ -40,6 +89,48 @@ class WatchlistRepository:
             .first()
         )
 
+    def existing_movie_ids(self, movie_ids):
+        """Return the subset of `movie_ids` that exist in Movies (one IN query)."""
+        if not movie_ids:
+            return set()
+        return set(self.db.scalars(select(Movies.id).where(Movies.id.in_(movie_ids))))
+
+    def watchlisted_movie_ids(self, user_id: int, movie_ids):
+        """Return the subset of `movie_ids` already in the user's watchlist (one IN query)."""
+        if not movie_ids:
+            return set()
+        return set(self.db.scalars(
+            select(Watchlist.movie_id).where(Watchlist.user_id == user_id, Watchlist.movie_id.in_(movie_ids))
+        ))
+
+    def statuses_for(self, user_id: int, movie_ids):
+        """Return `{movie_id: status}` for the given ids in the user's watchlist (one IN query)."""
+        if not movie_ids:
+            return {}
+        return dict(self.db.execute(
+            select(Watchlist.movie_id, Watchlist.status)
+            .where(Watchlist.user_id == user_id, Watchlist.movie_id.in_(movie_ids))
+        ).all())
+
+    def insert_many(self, user_id: int, movie_ids, status: str):
+        """Insert one watchlist row per movie id in a single multi-row INSERT."""
+        if not movie_ids:
+            return 0
+        self.db.execute(
+            insert(Watchlist),
+            [{"user_id": user_id, "movie_id": movie_id, "status": status} for movie_id in movie_ids],
+        )
+        self.adjust_counts(user_id, {status: len(movie_ids)})
+        return len(movie_ids)
+
+    def watchlist_entries(self, user_id: int, limit: int):
+        """Return up to `limit` (movie_id, status, created_at) rows of a user's watchlist."""
+        return self.db.execute(
+            select(Watchlist.movie_id, Watchlist.status, Watchlist.created_at)
+            .where(Watchlist.user_id == user_id)
+            .limit(limit)
+        ).all()
+
     def get_all_by_user(self, user_id: int):
         """Fetch all watchlist entries for a given user."""
         return self.db.query(Watchlist).filter_by(user_id=user_id).all()
@@ -47,33 +138,155 @@ class WatchlistRepository:
     def add(self, watchlist_item: Watchlist):
         """Add a new watchlist item."""
         self.db.add(watchlist_item)
-        self.db.commit()
-        self.db.refresh(watchlist_item)
+        self.db.flush()
+        self.adjust_counts(watchlist_item.user_id, {watchlist_item.status: 1})
         return watchlist_item
 
+    def add_all(self, watchlist_items: list):
+        """Add several watchlist items with a single flush."""
+        self.db.add_all(watchlist_items)
+        self.db.flush()
+        for user_id in {item.user_id for item in watchlist_items}:
+            self.adjust_counts(user_id, Counter(item.status for item in watchlist_items if item.user_id == user_id))
+        return watchlist_items
+
     def delete(self, user_id: int, movie_id: int):
         """Delete a watchlist item for a user and movie."""
         item = self.get_by_user_and_movie(user_id, movie_id)
         if item:
             self.db.delete(item)
-            self.db.commit()
+            self.db.flush()
+            self.adjust_counts(user_id, {item.status: -1})
             return True
         return False
 
+    def delete_many(self, user_id: int, movie_ids):
+        """Delete the user's entries for `movie_ids`; returns the number deleted."""
+        if not movie_ids:
+            return 0
+        where = (Watchlist.user_id == user_id, Watchlist.movie_id.in_(movie_ids))
+        removed = dict(self.db.execute(
+            select(Watchlist.status, func.count()).where(*where).group_by(Watchlist.status)
+        ).all())
+        self.db.execute(delete(Watchlist).where(*where).execution_options(synchronize_session=False))
+        self.adjust_counts(user_id, {status: -count for status, count in removed.items()})
+        return sum(removed.values())
+
     def update_status(self, user_id: int, movie_id: int, status: str):
         """Update the status of a watchlist item (e.g., 'To Watch' → 'Watched')."""
         item = self.get_by_user_and_movie(user_id, movie_id)
         if item:
+            previous = item.status
             item.status = status
-            self.db.commit()
-            self.db.refresh(item)
+            self.db.flush()
+            if previous != status:
+                self.adjust_counts(user_id, {previous: -1, status: 1})
             return item
         return None
     
     def summary(self, user_id: int):
-        """Return counts of total, 'To Watch', and 'Watched' movies."""
-        total = self.db.query(Watchlist).filter_by(user_id=user_id).count()
-        to_watch = self.db.query(Watchlist).filter_by(user_id=user_id, status="To Watch").count()
-        watched = self.db.query(Watchlist).filter_by(user_id=user_id, status="Watched").count()
+        """Return counts of total, 'To Watch', and 'Watched' movies.
+
+        Reads the user's Watchlist_Counts row (a primary key lookup). Users
+        without one yet are counted with a single GROUP BY."""
+        row = self.db.get(WatchlistCounts, user_id)
+        if row is not None:
+            return {"total_movies": row.total, "to_watch": row.to_watch, "watched": row.watched}
+        counts = self.count_by_status(user_id)
+        return {"total_movies": counts["total"], "to_watch": counts["to_watch"], "watched": counts["watched"]}
+
+    def count_by_status(self, user_id: int):
+        """Count a user's watchlist rows with one GROUP BY status query."""
+        rows = self.db.execute(
+            select(Watchlist.status, func.count()).where(Watchlist.user_id == user_id).group_by(Watchlist.status)
+        ).all()
+        counts = {"total": 0, "to_watch": 0, "watched": 0}
+        for status, count in rows:
+            counts["total"] += count
+            if status in STATUS_COUNTERS:
+                counts[STATUS_COUNTERS[status]] += count
+        return counts
+
+    def adjust_counts(self, user_id: int, deltas):
+        """Apply `{status: delta}` to the user's counters in the current transaction.
+
+        A missing counter row is created from a GROUP BY count, which already
+        includes this transaction's flushed changes. If another transaction
+        creates it first, the delta is applied to that row instead."""
+        total = sum(deltas.values())
+        values = {"total": WatchlistCounts.total + total}
+        for status, delta in deltas.items():
+            column = STATUS_COUNTERS.get(status)
+            if column and delta:
+                values[column] = getattr(WatchlistCounts, column) + delta
+        if not total and len(values) == 1:
+            return
+
+        statement = (
+            update(WatchlistCounts)
+            .where(WatchlistCounts.user_id == user_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if self.db.execute(statement).rowcount:
+            return
+        try:
+            with self.db.begin_nested():
+                self.db.execute(insert(WatchlistCounts).values(user_id=user_id, **self.count_by_status(user_id)))
+        except IntegrityError:
+            self.db.execute(statement)
+
+    def reconcile_counts(self, user_ids):
+        """Recompute the counters of `user_ids` from Watchlist; returns how many were wrong.
+
+        This must be the first read of its transaction. The counter rows are
+        locked first, and the recount is a locking read, so it sees the latest
+        committed Watchlist rows rather than a snapshot taken before the locks.
+        A concurrent write then either committed before the recount (and is
+        included in it) or waits on the counter row and applies its delta on
+        top of the corrected value."""
+        if not user_ids:
+            return 0
+        stored = {
+            row.user_id: row
+            for row in self.db.scalars(
+                select(WatchlistCounts).where(WatchlistCounts.user_id.in_(user_ids)).with_for_update()
+            )
+        }
+        actual = {user_id: {"total": 0, "to_watch": 0, "watched": 0} for user_id in user_ids}
+        rows = self.db.execute(
+            select(Watchlist.user_id, Watchlist.status, func.count())
+            .where(Watchlist.user_id.in_(user_ids))
+            .group_by(Watchlist.user_id, Watchlist.status)
+            .with_for_update(read=True)
+        ).all()
+        for user_id, status, count in rows:
+            actual[user_id]["total"] += count
+            if status in STATUS_COUNTERS:
+                actual[user_id][STATUS_COUNTERS[status]] += count
 
-        return {"total_movies": total, "to_watch": to_watch, "watched": watched}
+        fixed = 0
+        missing = []
+        for user_id, counts in actual.items():
+            row = stored.get(user_id)
+            if row is None:
+                missing.append({"user_id": user_id, **counts})
+            elif (row.total, row.to_watch, row.watched) != (counts["total"], counts["to_watch"], counts["watched"]):
+                row.total, row.to_watch, row.watched = counts["total"], counts["to_watch"], counts["watched"]
+                fixed += 1
+        self.db.flush()
+        if missing:
+            try:
+                with self.db.begin_nested():
+                    self.db.execute(insert(WatchlistCounts), missing)
+                fixed += len(missing)
+            except IntegrityError:
+                # A live write created some of these rows meanwhile; keep those.
+                for values in missing:
+                    try:
+                        with self.db.begin_nested():
+                            self.db.execute(insert(WatchlistCounts), [values])
+                        fixed += 1
+                    except IntegrityError:
+                        pass
+        return fixed
@@ -1,8 +1,9 @@
 '''This module defines the Pydantic schema models for the Watchlist feature of the application.'''
 
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from datetime import datetime
+from app.core.config import WATCHLIST_BULK_MAX_ITEMS
 
 class WatchlistBase(BaseModel):
 
@@ -17,6 +18,27 @@ class WatchlistCreate(WatchlistBase):
 
     pass
 
+class WatchlistBulkCreate(BaseModel):
+
+    '''Schema for adding several movies to the watchlist in one request.'''
+
+    movie_ids: List[int] = Field(..., min_length=1, max_length=WATCHLIST_BULK_MAX_ITEMS)
+    status: Optional[str] = "To Watch"
+
+class WatchlistCheckRequest(BaseModel):
+
+    '''Schema for checking several movies against the watchlist in one request.'''
+
+    movie_ids: List[int] = Field(..., min_length=1, max_length=WATCHLIST_BULK_MAX_ITEMS)
+
+class WatchlistCheckItem(BaseModel):
+
+    '''Membership of one movie id, in the shape returned by GET /watchlist/{movie_id}.'''
+
+    movie_id: int
+    inWatchlist: bool
+    status: Optional[str] = None
+
 class WatchlistUpdate(BaseModel):
 
     '''Schema for updating the status of an existing watchlist entry.'''
@@ -35,6 +57,21 @@ class WatchlistOut(BaseModel):
 
     model_config={"from_attributes":True}
 
+class WatchlistBulkItem(BaseModel):
+
+    '''Outcome for one movie id of a bulk add.'''
+
+    movie_id: int
+    result: Literal["added", "already_in_watchlist", "not_found", "duplicate"]
+
+class WatchlistBulkOut(BaseModel):
+
+    '''Response schema for a bulk add: totals plus one outcome per requested id, in order.'''
+
+    added: int
+    skipped: int
+    results: List[WatchlistBulkItem]
+
 class WatchlistSummary(BaseModel):
 
     '''Schema representing an aggregated summary of a user's watchlist.'''
@@ -0,0 +1,97 @@
+'''Background maintenance jobs that run inside each application worker.
+
+Jobs here work in small batches with a short pause between them so they never
+hold long locks on tables that serve live traffic. They are safe to run from
+several workers at once.'''
+
+import asyncio
+import time
+from sqlalchemy import select
+from app.core.config import (
+    LOGIN_PURGE_INTERVAL_SECONDS, LOGIN_PURGE_BATCH_SIZE, LOGIN_PURGE_BATCH_PAUSE_SECONDS,
+    WATCHLIST_COUNTS_RECONCILE_INTERVAL_SECONDS, WATCHLIST_COUNTS_RECONCILE_BATCH_SIZE,
+    WATCHLIST_COUNTS_RECONCILE_BATCH_PAUSE_SECONDS,
+)
+from app.core.logger import *
+from app.models.user import User
+from app.repositories.user_repository import UserRepository
+from app.repositories.watchlist_repository import WatchlistRepository
+from app.db.unit_of_work import UnitOfWork
+
+
+def purge_expired_logins_batch(batch_size: int = LOGIN_PURGE_BATCH_SIZE):
+    '''Delete one batch of expired `User_Logins` rows in its own short transaction.'''
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        with UnitOfWork(db):
+            return UserRepository(db).purge_expired_logins(batch_size)
+    finally:
+        db.close()
+
+
+async def run_login_purger(interval: float = LOGIN_PURGE_INTERVAL_SECONDS):
+    '''Periodically purge expired login records, one small batch at a time.'''
+    while True:
+        try:
+            total = 0
+            while True:
+                deleted = await asyncio.to_thread(purge_expired_logins_batch)
+                total += deleted
+                if deleted < LOGIN_PURGE_BATCH_SIZE:
+                    break
+                await asyncio.sleep(LOGIN_PURGE_BATCH_PAUSE_SECONDS)
+            if total:
+                events.info("Expired Logins Purged", deleted=total)
+        except Exception as e:
+            events.warning("Login Purge Failed", error=str(e))
+        await asyncio.sleep(interval)
+
+
+def reconcile_watchlist_counts_batch(after_user_id: int = 0, batch_size: int = WATCHLIST_COUNTS_RECONCILE_BATCH_SIZE):
+    '''Recompute `Watchlist_Counts` for the next `batch_size` users after `after_user_id`.
+
+    Returns `(last user id, users in the batch, counters fixed)`; the last id is
+    None once every user has been visited.'''
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        user_ids = list(db.scalars(
+            select(User.id).where(User.id > after_user_id).order_by(User.id).limit(batch_size)
+        ))
+        # End the transaction that picked the ids: under REPEATABLE READ its
+        # snapshot would hide writes committed before the recount takes its locks.
+        db.rollback()
+        with UnitOfWork(db):
+            fixed = WatchlistRepository(db).reconcile_counts(user_ids)
+    finally:
+        db.close()
+    return (user_ids[-1] if user_ids else None), len(user_ids), fixed
+
+
+def reconcile_watchlist_counts(pause: float = 0):
+    '''Walk every user in batches and fix counter drift; returns `(users, fixed)`.'''
+    after, users, fixed = 0, 0, 0
+    while after is not None:
+        after, batch, batch_fixed = reconcile_watchlist_counts_batch(after)
+        users += batch
+        fixed += batch_fixed
+        if pause and after is not None:
+            time.sleep(pause)
+    return users, fixed
+
+
+async def run_watchlist_count_reconciler(interval: float = WATCHLIST_COUNTS_RECONCILE_INTERVAL_SECONDS):
+    '''Periodically correct drift between `Watchlist_Counts` and `Watchlist`.'''
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            users, fixed = await asyncio.to_thread(
+                reconcile_watchlist_counts, WATCHLIST_COUNTS_RECONCILE_BATCH_PAUSE_SECONDS
+            )
+            if fixed:
+                events.warning("Watchlist Counts Reconciled", users=users, fixed=fixed)
+        except Exception as e:
+            events.warning("Watchlist Count Reconciliation Failed", error=str(e))
@@ -1,8 +1,15 @@
+import csv
+import io
+import json
 from app.models.watchlist import Watchlist
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from typing import List
-from app.repositories.watchlist_repository import WatchlistRepository
+from app.repositories.watchlist_repository import WatchlistRepository, SORT_COLUMNS
+from app.core.watchlist_cache import get_watchlist_snapshot, invalidate_watchlist
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.db.unit_of_work import UnitOfWork
+from app.core.config import WATCHLIST_EXPORT_BATCH_SIZE
 from app.exceptions.custom_exceptions import (
     MovieAlreadyInWatchlistException,
     MovieNotFoundException,
@@ -12,7 +19,9 @@ from app.exceptions.custom_exceptions import (
 class WatchlistService:
 
     ''' Service layer handling all watchlist-related operations such as
-      fetching creation, update, and deletion.'''
+      fetching creation, update, and deletion. Each write method is one
+      unit of work: a single commit, or a rollback if it raises, followed by
+      invalidating the user's cached watchlist.'''
 
     def __init__(self, db: Session):
         self.db = db
@@ -20,36 +29,94 @@ class WatchlistService:
 
 
     def add_to_watchlist(self, user_id: int, movie_ids: List[int], status_value: str = "To Watch"):
-        added_items = []
+        with UnitOfWork(self.db):
+            already_added = self.repo.watchlisted_movie_ids(user_id, movie_ids)
+            known_movies = self.repo.existing_movie_ids(movie_ids)
+            new_entries = []
+            for movie_id in movie_ids:
+                if movie_id in already_added:
+                    raise MovieAlreadyInWatchlistException(movie_id)
+                if movie_id not in known_movies:
+                    raise MovieNotFoundException(movie_id)
+
+                new_entries.append(Watchlist(user_id=user_id, movie_id=movie_id, status=status_value))
+            added = self.repo.add_all(new_entries)
+        invalidate_watchlist(user_id)
+        return added
+
+    def add_bulk_to_watchlist(self, user_id: int, movie_ids: List[int], status_value: str = "To Watch"):
+        """Add many movies at once and report what happened to each id.
+
+        Unlike `add_to_watchlist`, unknown or already present movies do not
+        fail the request; they are reported and skipped. The work is a fixed
+        number of statements whatever the size of `movie_ids`: one IN query
+        against Movies, one against Watchlist and one multi-row INSERT."""
+        unique_ids = list(dict.fromkeys(movie_ids))
+        with UnitOfWork(self.db):
+            already_added = self.repo.watchlisted_movie_ids(user_id, unique_ids)
+            known_movies = self.repo.existing_movie_ids(unique_ids)
+            to_insert = [m for m in unique_ids if m in known_movies and m not in already_added]
+            self.repo.insert_many(user_id, to_insert, status_value)
+        invalidate_watchlist(user_id)
+
+        results, seen = [], set()
         for movie_id in movie_ids:
-            if self.repo.get_by_user_and_movie(user_id, movie_id):
-                raise MovieAlreadyInWatchlistException(movie_id)
-
-            movie = self.repo.get_movie(movie_id)
-            if not movie:
-                raise MovieNotFoundException(movie_id)
-
-            new_entry = Watchlist(user_id=user_id, movie_id=movie_id, status=status_value)
-            added_items.append(self.repo.add(new_entry))
-        return added_items
+            if movie_id in seen:
+                result = "duplicate"
+            elif movie_id not in known_movies:
+                result = "not_found"
+            elif movie_id in already_added:
+                result = "already_in_watchlist"
+            else:
+                result = "added"
+            seen.add(movie_id)
+            results.append({"movie_id": movie_id, "result": result})
+        return {"added": len(to_insert), "skipped": len(movie_ids) - len(to_insert), "results": results}
 
     def update_watchlist_status(self, user_id: int, movie_id: int, status_value: str):
-        entry = self.repo.update_status(user_id, movie_id, status_value)
-        if not entry:
-            raise MovieNotInWatchlistException(movie_id)
+        with UnitOfWork(self.db):
+            entry = self.repo.update_status(user_id, movie_id, status_value)
+            if not entry:
+                raise MovieNotInWatchlistException(movie_id)
+        invalidate_watchlist(user_id)
         return entry
 
     def delete_from_watchlist(self, user_id: int, movie_id: int):
-        success = self.repo.delete(user_id, movie_id)
-        if not success:
-            raise MovieNotInWatchlistException(movie_id)
+        with UnitOfWork(self.db):
+            success = self.repo.delete(user_id, movie_id)
+            if not success:
+                raise MovieNotInWatchlistException(movie_id)
+        invalidate_watchlist(user_id)
         return {"message": f"Movie with id {movie_id} deleted successfully"}
 
-    def get_user_watchlist(self,user_id: int, status: str = None, sort: str = "created_at", desc: bool = True, page: int = 1, size: int = 10):
-            query = self.repo.get_user_watchlist_query(user_id, status, sort, desc)
-
-            total = query.count()
-            results = query.offset((page - 1) * size).limit(size).all()
+    def get_user_watchlist(self,user_id: int, status: str = None, sort: str = "created_at", desc: bool = True, page: int = 1, size: int = 10,
+                           cursor: str = None, include_total: bool = False):
+            """Return one page of a user's watchlist.
+
+            Pages are fetched by keyset: pass the `next_cursor` of the previous
+            page as `cursor`. `page` is still honoured when no cursor is given,
+            but costs OFFSET rows. The total is only counted if `include_total`
+            is set, and is then served from the user's cached watchlist."""
+            if sort not in SORT_COLUMNS:
+                raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_COLUMNS)}")
+
+            after = decode_cursor(cursor, sort, desc) if cursor else None
+            query = self.repo.get_user_watchlist_query(user_id, status, sort, desc, after)
+            if after is None and page > 1:
+                query = query.offset((page - 1) * size)
+
+            # One extra row tells whether there is a next page without counting.
+            results = query.limit(size + 1).all()
+            next_cursor = None
+            if len(results) > size:
+                results = results[:size]
+                last = results[-1][0]
+                next_cursor = encode_cursor(sort, desc, getattr(last, sort), last.id)
+
+            total = None
+            if include_total:
+                snapshot = self._snapshot(user_id)
+                total = snapshot.count(status) if snapshot.cacheable else self.repo.count_user_watchlist(user_id, status)
 
             items = [
                 {
@@ -62,7 +129,7 @@ class WatchlistService:
                 for w, title in results
             ]
 
-            return {"total": total, "items": items}
+            return {"total": total, "items": items, "next_cursor": next_cursor}
 
     # def delete_from_watchlist(self,user_id: int, movie_id: int):
     #     """Delete a specific movie from a user's watchlist."""
@@ -73,22 +140,72 @@ class WatchlistService:
 
     def delete_bulk_watchlist(self,user_id: int, movie_ids: List[int]):
         """Delete multiple movies from a user's watchlist."""
-        self.db.query(Watchlist).filter(
-            Watchlist.user_id == user_id,
-            Watchlist.movie_id.in_(movie_ids)
-        ).delete(synchronize_session=False)
-        self.db.commit()
+        with UnitOfWork(self.db):
+            self.repo.delete_many(user_id, movie_ids)
+        invalidate_watchlist(user_id)
         return {f"movies with id's {movie_ids} were deleted successfully"}
 
 
+    def _snapshot(self, user_id: int):
+        """The user's cached watchlist, loaded with one query on a miss."""
+        return get_watchlist_snapshot(user_id, lambda limit: self.repo.watchlist_entries(user_id, limit))
+
     def check_watchlist(self,user_id: int, movie_id: int):
         """Check if a movie exists in a user's watchlist."""
-        entry = self.repo.get_by_user_and_movie(user_id, movie_id)
+        snapshot = self._snapshot(user_id)
+        if snapshot.cacheable:
+            entry = snapshot.get(movie_id)
+            status = entry[0] if entry else None
+        else:
+            entry = self.repo.get_by_user_and_movie(user_id, movie_id)
+            status = entry.status if entry else None
         if not entry:
             return {"inWatchlist": False}
-        return {"inWatchlist": True, "status": entry.status}
+        return {"inWatchlist": True, "status": status}
+
+
+    def check_many(self, user_id: int, movie_ids: List[int]):
+        """Check several movies at once, answering from the user's cached
+        watchlist or else with a single IN query. Results follow the request order."""
+        snapshot = self._snapshot(user_id)
+        if snapshot.cacheable:
+            found = {movie_id: entry[0] for movie_id in movie_ids if (entry := snapshot.get(movie_id))}
+        else:
+            found = self.repo.statuses_for(user_id, list(set(movie_ids)))
+        return [
+            {"movie_id": movie_id, "inWatchlist": movie_id in found, "status": found.get(movie_id)}
+            for movie_id in movie_ids
+        ]
+
+
+    def export_watchlist(self, user_id: int, export_format: str = "ndjson"):
+        """Yield the user's whole watchlist as NDJSON or CSV text, one chunk per
+        batch of rows, for a streaming response."""
+        columns = ("id", "movie_id", "movie_title", "status", "created_at")
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue()
+
+        for rows in self.repo.export_rows(user_id, WATCHLIST_EXPORT_BATCH_SIZE):
+            records = [
+                (row.id, row.movie_id, row.movie_title, row.status,
+                 row.created_at.isoformat() if row.created_at else None)
+                for row in rows
+            ]
+            if export_format == "csv":
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(records)
+                yield buffer.getvalue()
+            else:
+                yield "".join(json.dumps(dict(zip(columns, record))) + "\n" for record in records)
 
 
     def get_summary(self,user_id: int):
-        """Get a summary of total, watched, and to-watch movies using repository."""
+        """Get a summary of total, watched, and to-watch movies, from the user's
+        cached watchlist or else from their counters."""
+        snapshot = self._snapshot(user_id)
+        if snapshot.cacheable:
+            return snapshot.summary()
         return self.repo.summary(user_id)
\ No newline at end of file
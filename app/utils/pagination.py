@@ -0,0 +1,63 @@
+'''Opaque cursors for keyset pagination.
+
+A cursor records where the previous page ended: the sort key, its direction,
+and the sort value and id of the last row. The next page then starts with a
+`WHERE (sort_col, id) < (value, id)` seek on an index, so page 1000 costs the
+same as page 1. There is no OFFSET.
+
+Cursors are URL-safe base64 of a small JSON document. Clients must treat
+them as opaque, because the encoding may change.'''
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from fastapi import HTTPException
+
+
+def encode_cursor(sort: str, desc: bool, value, row_id: int) -> str:
+    '''Encode the position after the row with sort value `value` and id `row_id`.'''
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps({"s": sort, "d": desc, "v": value, "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _parse_int(value) -> int:
+    if type(value) is not int:
+        raise TypeError("expected an integer")
+    return value
+
+
+def _parse_datetime(value) -> datetime:
+    if not isinstance(value, str):
+        raise TypeError("expected an ISO timestamp")
+    return datetime.fromisoformat(value)
+
+
+# Parser for the sort value of each sort key a cursor may carry.
+VALUE_PARSERS = {
+    "created_at": _parse_datetime,
+    "movie_id": _parse_int,
+}
+
+
+def decode_cursor(cursor: str, sort: str, desc: bool):
+    '''Return `(value, row_id)` from `cursor`, with `value` parsed for `sort`.
+
+    Raises 400 if the cursor is malformed, holds a value of the wrong type, or
+    was issued for a different sort order.'''
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        cursor_sort, cursor_desc, raw_value, raw_id = data["s"], data["d"], data["v"], data["i"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if cursor_sort != sort or cursor_desc != desc:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort order")
+
+    try:
+        return VALUE_PARSERS[sort](raw_value), _parse_int(raw_id)
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
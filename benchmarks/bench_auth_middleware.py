@@ -0,0 +1,132 @@
+'''Micro-benchmark of the per-request overhead added by the auth middleware.
+
+It compares the previous `BaseHTTPMiddleware` implementation with the plain
+ASGI `AuthMiddleware` by driving the ASGI apps directly (no network, no server),
+for both an exempt path and an authenticated path. The user lookup is served
+from the user cache so the database is never touched.
+
+Usage:
+    python -m benchmarks.bench_auth_middleware [--requests 20000]'''
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.security import create_jwt, verify_jwt
+from app.core.user_cache import UserSnapshot, user_cache, load_user
+from app.db.session import SessionLocal
+from app.middleware.middleware import AuthMiddleware, EXEMPT_PATHS
+
+
+def cached_user(user_id: int):
+    '''The previous lookup: the user cache, else a short-lived session of its own.'''
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+    db = SessionLocal()
+    try:
+        return load_user(db, user_id)
+    finally:
+        db.close()
+
+
+class LegacyAuthMiddleware(BaseHTTPMiddleware):
+
+    '''The previous BaseHTTPMiddleware-based implementation, kept for comparison.'''
+
+    async def dispatch(self, request: Request, call_next):
+        if any(request.url.path.startswith(path) for path in EXEMPT_PATHS):
+            return await call_next(request)
+
+        auth_header = request.headers.get("Authorization")
+        request.state.user = None
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return JSONResponse(status_code=401, content={"detail": "Invalid authorization"})
+
+        payload = verify_jwt(auth_header.split(" ")[1])
+        if not payload:
+            return JSONResponse(status_code=401, content={"detail": "Invalid or expired token"})
+
+        user = cached_user(payload.get("user_id"))
+        request.state.user = user
+        if not user:
+            return JSONResponse(status_code=401, content={"detail": "User not found"})
+        return await call_next(request)
+
+
+def build_app(middleware=None):
+    app = FastAPI()
+
+    @app.get("/docs-ping")
+    async def exempt():
+        return PlainTextResponse("ok")
+
+    @app.get("/watchlist/ping")
+    async def protected():
+        return PlainTextResponse("ok")
+
+    if middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+
+async def drive(app, path: str, headers, n: int):
+    '''Send `n` GET requests for `path` straight into the ASGI app.'''
+    body = {"type": "http.request", "body": b"", "more_body": False}
+
+    async def receive():
+        return body
+
+    async def send(message):
+        pass
+
+    def scope():
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+            "root_path": "", "query_string": b"", "headers": headers,
+            "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+        }
+
+    for _ in range(200):
+        await app(scope(), receive, send)
+    start = time.perf_counter()
+    for _ in range(n):
+        await app(scope(), receive, send)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    logging.getLogger("auth").setLevel(logging.WARNING)
+    user_cache.set(1, UserSnapshot(1, "bench", "bench@example.com", "user", "active", None), ttl=3600)
+    token = create_jwt({"user_id": 1, "role": "user"})
+    auth = [(b"authorization", f"Bearer {token}".encode())]
+
+    # Use an exempt prefix from the real list so both middlewares skip auth.
+    exempt_path = EXEMPT_PATHS[2] + "-ping"
+    apps = {
+        "no middleware": build_app(),
+        "BaseHTTPMiddleware": build_app(LegacyAuthMiddleware),
+        "pure ASGI": build_app(AuthMiddleware),
+    }
+
+    print(f"{'variant':<20} {'exempt (us/req)':>16} {'authenticated (us/req)':>24}")
+    for name, app in apps.items():
+        exempt = asyncio.run(drive(app, exempt_path, [], args.requests))
+        authed = asyncio.run(drive(app, "/watchlist/ping", auth, args.requests))
+        print(f"{name:<20} {exempt:>16.1f} {authed:>24.1f}")
+
+
+if __name__ == "__main__":
+    main()
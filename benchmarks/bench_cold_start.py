@@ -0,0 +1,63 @@
+'''Measures worker cold start: importing `app.main` and running its lifespan startup.
+
+Each run is a fresh interpreter, like a new uvicorn worker or a `--reload`
+restart. The schema is created once up front with `app.db.schema.create_schema`,
+as a deployment would do with `python -m app.db.cli create-schema`.
+
+Usage:
+    python -m benchmarks.bench_cold_start [--runs 5] [--database-url sqlite:///...]'''
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+_CHILD = """
+import asyncio, json, logging, time
+started = time.perf_counter()
+import app.main as main
+imported = time.perf_counter()
+logging.getLogger("auth").setLevel(logging.WARNING)
+
+async def startup():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(startup())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "total_ms": (ready - started) * 1000,
+}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url", default=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'cold.db')}")
+    args = parser.parse_args()
+
+    env = dict(os.environ, DATABASE_URL=args.database_url)
+    subprocess.run(
+        [sys.executable, "-m", "app.db.cli", "create-schema"], env=env, check=True, capture_output=True
+    )
+
+    results = []
+    for _ in range(args.runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _CHILD], env=env, check=True, capture_output=True, text=True
+        ).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    print(f"{'phase':<12} {'median (ms)':>12} {'max (ms)':>10}")
+    for phase in ("import_ms", "startup_ms", "total_ms"):
+        values = [r[phase] for r in results]
+        print(f"{phase[:-3]:<12} {statistics.median(values):>12.1f} {max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+'''Micro-benchmark of the JWT part of the auth hot path.
+
+Compares a full python-jose decode + HMAC check (what `verify_jwt` did on every
+request) with `verify_jwt` served from the decoded-JWT cache, and measures the
+whole authenticated middleware path with the cache cold and warm.
+
+Usage:
+    python -m benchmarks.bench_verify_jwt [--iterations 50000]'''
+
+import argparse
+import asyncio
+import logging
+import os
+import timeit
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from jose import jwt
+from app.core.config import SECRET_KEY, ALGORITHM
+from app.core.security import create_jwt, verify_jwt, jwt_cache
+from app.core.user_cache import UserSnapshot, user_cache
+from benchmarks.bench_auth_middleware import build_app, drive
+from app.middleware.middleware import AuthMiddleware
+
+
+def per_call_us(stmt, number):
+    return min(timeit.repeat(stmt, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+
+    logging.getLogger("auth").setLevel(logging.WARNING)
+    token = create_jwt({"user_id": 1, "role": "user"})
+
+    decode = per_call_us(lambda: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]), args.iterations)
+    verify_jwt(token)
+    cached = per_call_us(lambda: verify_jwt(token), args.iterations)
+
+    print(f"{'jose decode (uncached)':<32} {decode:>8.2f} us/call")
+    print(f"{'verify_jwt (cached)':<32} {cached:>8.2f} us/call")
+
+    user_cache.set(1, UserSnapshot(1, "bench", "bench@example.com", "user", "active", None), ttl=3600)
+    app = build_app(AuthMiddleware)
+    headers = [(b"authorization", f"Bearer {token}".encode())]
+    requests = max(args.iterations // 10, 1000)
+
+    real_get = jwt_cache.get
+    jwt_cache.get = lambda key, default=None: default
+    cold = asyncio.run(drive(app, "/watchlist/ping", headers, requests))
+    jwt_cache.get = real_get
+    warm = asyncio.run(drive(app, "/watchlist/ping", headers, requests))
+
+    print(f"{'auth path, JWT cache cold':<32} {cold:>8.2f} us/request")
+    print(f"{'auth path, JWT cache warm':<32} {warm:>8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
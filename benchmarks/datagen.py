@@ -0,0 +1,230 @@
+'''Deterministic synthetic dataset for benchmarking.
+
+Fills every table used by the app (`User`, `Movies`, `Reviews`, `Watchlist`,
+`Platforms`, `Regions`, `Movie_Availability`, `Recommendation`) with generated
+rows. The same `--seed` and `--scale` always produce the same data.
+
+Popularity is skewed like real traffic: movies are picked from a Zipf-like
+distribution (weight `1 / rank ** s`), and so are the users who write reviews,
+so a few titles and a few heavy users dominate. Rows are written with Core
+`executemany` inserts in batches, and generated lazily, so memory stays flat
+at millions of rows. At `--scale 1` the dataset is about 2.7M rows.
+
+All users share the password `BENCHMARK_PASSWORD`, hashed once, so logging in
+works without hashing a million passwords.
+
+Usage:
+    python -m benchmarks.datagen --database-url sqlite:///bench.db [--scale 1] [--seed 42]'''
+
+import argparse
+import bisect
+import itertools
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+BENCHMARK_PASSWORD = "Benchmark1!"
+
+GENRES = ("Drama", "Comedy", "Action", "Thriller", "Horror", "Romance", "Sci-Fi", "Documentary", "Animation")
+LANGUAGES = ("English", "Hindi", "Spanish", "French", "Japanese", "Korean", "Tamil", "German")
+PLATFORM_TYPES = ("subscription", "rental", "free", "purchase")
+AVAILABILITY_TYPES = ("stream", "rent", "buy")
+WATCH_STATUSES = ("To Watch", "Watched")
+EPOCH = datetime(2020, 1, 1)
+
+
+def counts_for(scale: float) -> dict:
+    '''Row counts per table for a given scale factor.'''
+    return {
+        "users": max(int(100_000 * scale), 10),
+        "movies": max(int(20_000 * scale), 10),
+        "platforms": 20,
+        "regions": 50,
+        "reviews": int(1_000_000 * scale),
+        "watchlist_per_user": 10,
+        "availability_per_movie": 3,
+        "recommendations_per_user": 5,
+    }
+
+
+class ZipfSampler:
+
+    ''' Draws ids in `1..n` with probability proportional to `1 / rank ** s`.
+
+    Ranks are shuffled onto ids so the most popular items are not simply the
+    lowest ids.'''
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self.ids = list(range(1, n + 1))
+        rng.shuffle(self.ids)
+        self.cum_weights = list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+        self.total = self.cum_weights[-1]
+        self.rng = rng
+
+    def sample(self) -> int:
+        index = bisect.bisect_left(self.cum_weights, self.rng.random() * self.total)
+        return self.ids[min(index, len(self.ids) - 1)]
+
+    def sample_distinct(self, k: int) -> list:
+        '''Up to `k` distinct ids, still skewed towards the popular ones.'''
+        picked = set()
+        for _ in range(k * 4):
+            picked.add(self.sample())
+            if len(picked) == k:
+                break
+        return list(picked)
+
+
+def _timestamp(rng: random.Random) -> datetime:
+    return EPOCH + timedelta(seconds=rng.randrange(0, 5 * 365 * 86400))
+
+
+def gen_users(n, password_hash, rng):
+    for i in range(1, n + 1):
+        yield {
+            "id": i, "username": f"user{i:07d}", "email": f"user{i:07d}@example.com",
+            "role": "admin" if i == 1 else "user", "password": password_hash,
+            "status": "active", "created_at": _timestamp(rng),
+        }
+
+
+def gen_movies(n, users, rng):
+    for i in range(1, n + 1):
+        yield {
+            "id": i, "title": f"Movie {i}", "description": f"Synthetic movie number {i}.",
+            "genre": rng.choice(GENRES), "language": rng.choice(LANGUAGES),
+            "director": f"Director {rng.randrange(1, max(n // 10, 2))}",
+            "release_year": rng.randrange(1950, 2026), "rating": round(rng.uniform(1, 10), 1),
+            "approved": rng.random() < 0.9, "created_by": rng.randrange(1, users + 1),
+            "created_at": _timestamp(rng),
+        }
+
+
+def gen_platforms(n, rng):
+    for i in range(1, n + 1):
+        yield {
+            "id": i, "name": f"Platform {i}", "type": rng.choice(PLATFORM_TYPES),
+            "website": f"https://platform{i}.example.com",
+        }
+
+
+def gen_regions(n):
+    for i in range(1, n + 1):
+        yield {"id": i, "name": f"Region {i}", "code": f"R{i:03d}"}
+
+
+def gen_reviews(n, user_sampler, movie_sampler, rng):
+    for i in range(1, n + 1):
+        yield {
+            "id": i, "movie_id": movie_sampler.sample(), "user_id": user_sampler.sample(),
+            "rating": rng.randrange(1, 11) / 2, "comment": "Synthetic review.",
+            "created_at": _timestamp(rng),
+        }
+
+
+def gen_watchlist(users, per_user, movie_sampler, rng):
+    next_id = itertools.count(1)
+    for user_id in range(1, users + 1):
+        # Heavy-tailed list length: most users keep a few movies, some keep many.
+        k = min(int(rng.paretovariate(1.5) * per_user / 3) + 1, per_user * 20)
+        for movie_id in movie_sampler.sample_distinct(k):
+            yield {
+                "id": next(next_id), "user_id": user_id, "movie_id": movie_id,
+                "status": rng.choice(WATCH_STATUSES), "created_at": _timestamp(rng),
+            }
+
+
+def gen_availability(movies, per_movie, platforms, regions, rng):
+    next_id = itertools.count(1)
+    for movie_id in range(1, movies + 1):
+        for _ in range(rng.randrange(1, per_movie * 2)):
+            start = date(2020, 1, 1) + timedelta(days=rng.randrange(0, 1500))
+            yield {
+                "id": next(next_id), "movie_id": movie_id,
+                "platform_id": rng.randrange(1, platforms + 1), "region_id": rng.randrange(1, regions + 1),
+                "availability_type": rng.choice(AVAILABILITY_TYPES),
+                "start_date": start, "end_date": start + timedelta(days=rng.randrange(30, 720)),
+            }
+
+
+def gen_recommendations(users, per_user, movie_sampler, rng):
+    next_id = itertools.count(1)
+    for user_id in range(1, users + 1):
+        for movie_id in movie_sampler.sample_distinct(per_user):
+            yield {
+                "id": next(next_id), "user_id": user_id, "recommended_movie_id": movie_id,
+                "reason": "Similar to your watchlist",
+            }
+
+
+def bulk_insert(conn, table, rows, batch_size: int) -> int:
+    '''Insert `rows` with one executemany per batch; returns the row count.'''
+    total = 0
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return total
+        conn.execute(table.insert(), batch)
+        total += len(batch)
+
+
+def generate(engine, scale: float = 1.0, seed: int = 42, batch_size: int = 10_000, log=print):
+    '''Create the schema on `engine` and fill it; returns row counts per table.'''
+    from app.core.hashing import pwd_context
+    from app.db.schema import load_models
+
+    metadata = load_models()
+    tables = metadata.tables
+    metadata.create_all(bind=engine)
+    counts = counts_for(scale)
+    rng = random.Random(seed)
+    movie_sampler = ZipfSampler(counts["movies"], 1.1, random.Random(seed + 1))
+    user_sampler = ZipfSampler(counts["users"], 0.8, random.Random(seed + 2))
+    password_hash = pwd_context.hash(BENCHMARK_PASSWORD)
+
+    plan = (
+        ("User", gen_users(counts["users"], password_hash, rng)),
+        ("Movies", gen_movies(counts["movies"], counts["users"], rng)),
+        ("Platforms", gen_platforms(counts["platforms"], rng)),
+        ("Regions", gen_regions(counts["regions"])),
+        ("Reviews", gen_reviews(counts["reviews"], user_sampler, movie_sampler, rng)),
+        ("Watchlist", gen_watchlist(counts["users"], counts["watchlist_per_user"], movie_sampler, rng)),
+        ("Movie_Availability", gen_availability(
+            counts["movies"], counts["availability_per_movie"], counts["platforms"], counts["regions"], rng)),
+        ("Recommendation", gen_recommendations(
+            counts["users"], counts["recommendations_per_user"], movie_sampler, rng)),
+    )
+
+    written = {}
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        for name, rows in plan:
+            start = time.perf_counter()
+            written[name] = bulk_insert(conn, tables[name], rows, batch_size)
+            conn.commit()
+            log(f"{name:<20} {written[name]:>10,} rows  {time.perf_counter() - start:6.1f}s")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", "sqlite:///bench.db"))
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+
+    engine = create_engine(args.database_url)
+    start = time.perf_counter()
+    written = generate(engine, args.scale, args.seed, args.batch_size)
+    print(f"{'total':<20} {sum(written.values()):>10,} rows  {time.perf_counter() - start:6.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+'''End-to-end latency and throughput harness.
+
+Boots `app.main:app` under uvicorn against a local SQLite file (or any
+`--database-url`), then drives each endpoint over HTTP and reports p50/p95/p99
+latency and throughput per endpoint. Users and movie ids are drawn with the
+same Zipf-like skew as the generated data, so hot rows stay hot.
+
+Tokens are minted with `create_jwt` for a sample of generated users, so login
+rate limits and Argon2 cost do not distort read benchmarks; `POST /auth/login`
+is measured separately with `--login`.
+
+Usage:
+    python -m benchmarks.datagen --database-url sqlite:///bench.db --scale 0.1
+    python -m benchmarks.harness --database-url sqlite:///bench.db [--requests 2000] [--concurrency 32] [--workers 1]'''
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.datagen import BENCHMARK_PASSWORD, ZipfSampler, counts_for
+
+ENDPOINTS = (
+    ("GET /auth/me", "GET", lambda user, movie: "/auth/me"),
+    ("GET /watchlist/", "GET", lambda user, movie: "/watchlist/?page=1&size=10"),
+    ("GET /watchlist/{movie_id}", "GET", lambda user, movie: f"/watchlist/{movie}"),
+    ("GET /watchlist/summary/all", "GET", lambda user, movie: "/watchlist/summary/all"),
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url: str, port: int, workers: int):
+    '''Start uvicorn in a subprocess and wait until it answers.'''
+    env = dict(os.environ, DATABASE_URL=database_url, LOG_CONSOLE_LEVEL="WARNING", LOG_FILE_LEVEL="WARNING")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/openapi.json", timeout=1)
+            return server
+        except httpx.TransportError:
+            if server.poll() is not None:
+                raise RuntimeError("server exited during startup")
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("server did not start within 60s")
+
+
+def percentile(ordered, fraction: float) -> float:
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def measure(client, method, make_request, total: int, concurrency: int):
+    '''Issue `total` requests with `concurrency` in flight; return latencies (s) and wall time.'''
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(make_request())
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            path, headers, body = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, headers=headers, json=body)
+            except httpx.TransportError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start, errors
+
+
+def report(name, latencies, wall, errors):
+    ordered = sorted(latencies)
+    print(
+        f"{name:<28} {len(ordered) / wall:>9.1f} "
+        f"{percentile(ordered, 0.50) * 1000:>8.2f} {percentile(ordered, 0.95) * 1000:>8.2f} "
+        f"{percentile(ordered, 0.99) * 1000:>8.2f} {statistics.fmean(ordered) * 1000:>8.2f} {errors:>6}"
+    )
+
+
+async def run(args, base_url):
+    from app.core.security import create_jwt
+
+    counts = counts_for(args.scale)
+    rng = random.Random(args.seed)
+    users = ZipfSampler(counts["users"], 0.8, random.Random(args.seed + 2))
+    movies = ZipfSampler(counts["movies"], 1.1, random.Random(args.seed + 1))
+    token_users = users.sample_distinct(args.users)
+    tokens = {user: create_jwt({"user_id": user, "role": "user"}) for user in token_users}
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        print(f"{'endpoint':<28} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean ms':>8} {'errors':>6}")
+        for name, method, path_for in ENDPOINTS:
+            def make_request():
+                user = rng.choice(token_users)
+                headers = {"Authorization": f"Bearer {tokens[user]}"}
+                return path_for(user, movies.sample()), headers, None
+
+            await measure(client, method, make_request, min(args.requests // 10, 200), args.concurrency)
+            report(name, *await measure(client, method, make_request, args.requests, args.concurrency))
+
+        if args.login:
+            def make_login():
+                user = rng.choice(token_users)
+                body = {"email": f"user{user:07d}@example.com", "password": BENCHMARK_PASSWORD}
+                return "/auth/login", {}, body
+
+            report("POST /auth/login", *await measure(client, "POST", make_login, args.login, args.concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default="sqlite:///bench.db")
+    parser.add_argument("--scale", type=float, default=0.1, help="scale the database was generated with")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--users", type=int, default=500, help="distinct users to send requests as")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--login", type=int, default=0, help="also measure this many logins (rate limits apply)")
+    parser.add_argument("--url", help="benchmark an already running server instead of starting one")
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(run(args, args.url))
+        return
+
+    port = _free_port()
+    server = start_server(args.database_url, port, args.workers)
+    try:
+        asyncio.run(run(args, f"http://127.0.0.1:{port}"))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
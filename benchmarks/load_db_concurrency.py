@@ -0,0 +1,119 @@
+'''Load test showing how DB-bound async routes scale with concurrency.
+
+It serves `GET /watchlist/summary/all` from the real application against a
+throwaway SQLite file, and every SQL statement is delayed by `--latency` ms to
+stand in for the network round trip to a database server. The same service
+call is also mounted inline (blocking the event loop) at `/bench/inline-summary`
+for comparison. Requests are driven in-process through httpx's ASGI transport at
+increasing concurrency levels.
+
+The user and watchlist caches are switched off (their size is set to 0), so
+every request authenticates and loads the watchlist from the database instead
+of being answered from memory.
+
+With the inline call, throughput stays flat no matter how many requests are in
+flight; with `run_db` it grows until the DB thread pool is saturated. The inline
+variant is only run up to `DB_EXECUTOR_WORKERS` concurrent requests: beyond the
+connection pool's capacity it deadlocks, because the loop blocks waiting for a
+connection that only a (never scheduled) session close would return.
+
+Usage:
+    python -m benchmarks.load_db_concurrency [--requests 200] [--latency 5]'''
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+_db_path = os.path.join(tempfile.mkdtemp(), "load.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_path}")
+os.environ["USER_CACHE_MAX_SIZE"] = "0"
+os.environ["WATCHLIST_CACHE_BACKEND"] = "memory"
+os.environ["WATCHLIST_CACHE_MAX_SIZE"] = "0"
+
+import httpx
+from fastapi import Depends, Request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.main import app
+from app.db.session import SessionLocal, get_engine, get_db
+from app.db.schema import create_schema
+from app.core.security import create_jwt
+from app.core.config import DB_EXECUTOR_WORKERS
+from app.models.user import User, Movies
+from app.models.watchlist import Watchlist
+from app.services.watchlist import WatchlistService
+
+
+@app.get("/bench/inline-summary")
+async def inline_summary(request: Request, db: Session = Depends(get_db)):
+    '''The summary route as it was before: the sync service call blocks the loop.'''
+    return WatchlistService(db).get_summary(request.state.user.id)
+
+
+def seed():
+    create_schema()
+    db = SessionLocal()
+    try:
+        user = User(username="load", email="load@example.com", password="x", role="user")
+        db.add(user)
+        db.flush()
+        movies = [Movies(title=f"movie {i}", created_by=user.id) for i in range(50)]
+        db.add_all(movies)
+        db.flush()
+        db.add_all(Watchlist(user_id=user.id, movie_id=m.id) for m in movies)
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+async def run_level(client, path: str, headers, total: int, concurrency: int):
+    '''Send `total` requests with at most `concurrency` in flight; return req/s.'''
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            response = await client.get(path, headers=headers)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def run(args, headers):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'concurrency':>11} {'inline (req/s)':>15} {'run_db (req/s)':>15}")
+        for concurrency in args.levels:
+            inline = "n/a"
+            if concurrency <= DB_EXECUTOR_WORKERS:
+                rate = await run_level(client, "/bench/inline-summary", headers, args.requests, concurrency)
+                inline = f"{rate:.1f}"
+            pooled = await run_level(client, "/watchlist/summary/all", headers, args.requests, concurrency)
+            print(f"{concurrency:>11} {inline:>15} {pooled:>15.1f}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=5.0, help="added per SQL statement, in ms")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 15, 64])
+    args = parser.parse_args()
+
+    logging.getLogger("auth").setLevel(logging.WARNING)
+    user_id = seed()
+
+    @event.listens_for(get_engine(), "before_cursor_execute")
+    def _simulate_round_trip(*_):
+        time.sleep(args.latency / 1000)
+
+    headers = {"Authorization": f"Bearer {create_jwt({'user_id': user_id, 'role': 'user'})}"}
+    asyncio.run(run(args, headers))
+
+
+if __name__ == "__main__":
+    main()
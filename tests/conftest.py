@@ -0,0 +1,98 @@
+'''Shared test setup.
+
+Every test runs against a throwaway SQLite database file. Settings are read
+when `app.core.config` is imported, so the environment is prepared here before
+any application module is loaded.'''
+
+import os
+import tempfile
+
+_TEST_DIR = tempfile.mkdtemp(prefix="movie_api_tests_")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_TEST_DIR, "test.db")
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["RATE_LIMIT_BACKEND"] = "memory"
+os.environ["WATCHLIST_CACHE_BACKEND"] = "memory"
+os.environ["METRICS_MULTIPROC_DIR"] = ""
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["WATCHLIST_COUNTS_RECONCILE_INTERVAL_SECONDS"] = "0"
+os.environ["LOG_DIR"] = os.path.join(_TEST_DIR, "logs")
+os.environ.setdefault("LOG_CONSOLE_LEVEL", "WARNING")
+
+import pytest
+from fastapi.testclient import TestClient
+from app.core import rate_limit
+from app.core.security import create_jwt
+from app.core.user_cache import user_cache
+from app.core.watchlist_cache import watchlist_cache
+from app.db.replicas import recent_writers
+from app.db.schema import create_schema, load_models
+from app.db.session import SessionLocal, get_engine
+from app.models.user import Movies, User
+
+
+@pytest.fixture(autouse=True)
+def database():
+    '''Fresh tables and empty per-process caches for every test.'''
+    engine = get_engine()
+    load_models().drop_all(bind=engine)
+    create_schema(engine)
+    user_cache.clear()
+    watchlist_cache.clear()
+    recent_writers.clear()
+    yield engine
+
+
+@pytest.fixture
+def db(database):
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    '''Create a user directly in the database; the password is not a real hash.'''
+    def make(username="alice", role="user"):
+        user = User(username=username, email=f"{username}@example.com", role=role, password="unused")
+        db.add(user)
+        db.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def movies(db, make_user):
+    '''Ten movies, ids 1 to 10.'''
+    curator = make_user("curator", role="admin")
+    rows = [Movies(title=f"Movie {i}", created_by=curator.id) for i in range(1, 11)]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+@pytest.fixture
+def auth_headers():
+    '''Return the Authorization header for a user, with a freshly signed token.'''
+    def headers(user):
+        return {"Authorization": "Bearer " + create_jwt({"user_id": user.id, "role": user.role})}
+    return headers
+
+
+@pytest.fixture
+def client(monkeypatch):
+    '''Test client with the application lifespan running and empty rate limits.'''
+    from app.main import app
+
+    backend = rate_limit.MemoryBackend()
+    monkeypatch.setattr(rate_limit.ip_limiter, "backend", backend)
+    monkeypatch.setattr(rate_limit.email_limiter, "backend", backend)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def pytest_sessionfinish(session, exitstatus):
+    # The console log handler holds pytest's captured stderr, which is closed
+    # before the logger's own atexit hook would drain the queue.
+    from app.core.logger import stop_logging
+
+    stop_logging()
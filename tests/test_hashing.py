@@ -0,0 +1,52 @@
+'''Password hashing on the bounded executor.'''
+
+import asyncio
+import os
+import signal
+import pytest
+from fastapi import HTTPException
+from app.core import hashing
+from app.core.config import PASSWORD_HASH_MAX_PENDING
+from app.core.security import hash_password_async, verify_password_async
+
+PASSWORD = "Passw0rd!"
+
+
+def test_hash_and_verify():
+    hashed = asyncio.run(hash_password_async(PASSWORD))
+    assert asyncio.run(verify_password_async(PASSWORD, hashed))
+    assert not asyncio.run(verify_password_async("Wrong0rd!", hashed))
+
+
+def test_full_queue_is_a_503(monkeypatch):
+    monkeypatch.setattr(hashing, "_pending", PASSWORD_HASH_MAX_PENDING)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(hash_password_async(PASSWORD))
+
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"] == "1"
+
+
+def test_register_is_a_503_when_the_queue_is_full(client, monkeypatch):
+    monkeypatch.setattr(hashing, "_pending", PASSWORD_HASH_MAX_PENDING)
+    response = client.post(
+        "/auth/register",
+        json={"username": "alice", "email": "alice@example.com", "password": PASSWORD, "role": "user"},
+    )
+    assert response.status_code == 503
+
+
+def test_pool_is_rebuilt_after_a_worker_dies(monkeypatch):
+    monkeypatch.setattr(hashing, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(hashing, "_executor", None)
+    try:
+        hashed = asyncio.run(hashing.hash_in_pool(PASSWORD))
+        broken = hashing.get_executor()
+        for pid in list(broken._processes):
+            os.kill(pid, signal.SIGKILL)
+
+        assert asyncio.run(hashing.verify_in_pool(PASSWORD, hashed))
+        assert hashing.get_executor() is not broken
+    finally:
+        hashing.shutdown_executor()
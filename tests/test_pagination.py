@@ -0,0 +1,80 @@
+'''Keyset pagination of GET /watchlist/ and the cursor format.'''
+
+import base64
+import json
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from app.services.watchlist import WatchlistService
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def _raw_cursor(document) -> str:
+    return base64.urlsafe_b64encode(json.dumps(document).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("created_at", True, datetime(2024, 5, 1, 12, 30), 42)
+    assert decode_cursor(cursor, "created_at", True) == (datetime(2024, 5, 1, 12, 30), 42)
+
+    cursor = encode_cursor("movie_id", False, 7, 3)
+    assert decode_cursor(cursor, "movie_id", False) == (7, 3)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    _raw_cursor(["created_at", True]),
+    _raw_cursor({"s": "created_at", "d": True, "v": "garbage", "i": 1}),
+    _raw_cursor({"s": "created_at", "d": True, "v": 5, "i": 1}),
+    _raw_cursor({"s": "created_at", "d": True, "v": "2024-01-01T00:00:00", "i": "1"}),
+    _raw_cursor({"s": "created_at", "d": True, "v": "2024-01-01T00:00:00"}),
+    _raw_cursor({"s": "created_at", "d": False, "v": "2024-01-01T00:00:00", "i": 1}),
+    _raw_cursor({"s": "movie_id", "d": True, "v": 1, "i": 1}),
+])
+def test_bad_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, "created_at", True)
+    assert error.value.status_code == 400
+
+
+@pytest.fixture
+def watchlist_owner(db, make_user, movies):
+    user = make_user()
+    WatchlistService(db).add_bulk_to_watchlist(user.id, [movie.id for movie in movies])
+    return user
+
+
+def _all_pages(client, headers, query):
+    pages, cursor = [], None
+    while True:
+        url = f"/watchlist/?size=4&{query}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        pages.append([item["movie_id"] for item in response.json()])
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+
+
+def test_pages_follow_the_cursor_without_gaps_or_repeats(client, auth_headers, watchlist_owner):
+    # Bulk-added rows share created_at, so the id breaks the tie.
+    pages = _all_pages(client, auth_headers(watchlist_owner), "sort=created_at&desc=true")
+    assert pages == [[10, 9, 8, 7], [6, 5, 4, 3], [2, 1]]
+
+
+def test_pages_by_movie_id_ascending(client, auth_headers, watchlist_owner):
+    pages = _all_pages(client, auth_headers(watchlist_owner), "sort=movie_id&desc=false")
+    assert pages == [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10]]
+
+
+def test_total_is_only_sent_when_requested(client, auth_headers, watchlist_owner):
+    headers = auth_headers(watchlist_owner)
+    assert "x-total-count" not in client.get("/watchlist/", headers=headers).headers
+    response = client.get("/watchlist/?include_total=true", headers=headers)
+    assert response.headers["x-total-count"] == "10"
+
+
+def test_malformed_cursor_value_is_a_client_error(client, auth_headers, watchlist_owner):
+    cursor = _raw_cursor({"s": "created_at", "d": True, "v": "garbage", "i": 1})
+    response = client.get(f"/watchlist/?cursor={cursor}", headers=auth_headers(watchlist_owner))
+    assert response.status_code == 400
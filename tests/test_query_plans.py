@@ -0,0 +1,21 @@
+'''Every hot query must be served by an index, never by a full table scan.'''
+
+import pytest
+from sqlalchemy import select
+from app.db.query_plans import hot_queries, query_full_scans
+from app.models.watchlist import Watchlist
+
+HOT_QUERIES = dict(hot_queries())
+
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_hot_query_does_not_scan_a_table(database, name):
+    assert query_full_scans(HOT_QUERIES[name], database) == []
+
+
+def test_full_scan_is_detected(database):
+    # No index starts with status, so this reads all of Watchlist.
+    scans = query_full_scans(
+        lambda db: db.execute(select(Watchlist.id).where(Watchlist.status == "Watched")).all(), database
+    )
+    assert scans and scans[0].startswith("SCAN Watchlist")
@@ -0,0 +1,67 @@
+'''Sliding-window rate limits on /auth/login and /auth/register.'''
+
+import threading
+import pytest
+from app.core import rate_limit
+from app.core.rate_limit import MemoryBackend, RateLimiter, SQLiteBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteBackend(path=str(tmp_path / "rate_limit.db"))
+    return MemoryBackend()
+
+
+def test_limit_applies_per_key(backend):
+    limiter = RateLimiter(backend, limit=3, window=60)
+    assert [limiter.allow("a") for _ in range(4)] == [True, True, True, False]
+    assert limiter.allow("b")
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "rate_limit.db")
+    first = RateLimiter(SQLiteBackend(path=path), limit=2, window=60)
+    second = RateLimiter(SQLiteBackend(path=path), limit=2, window=60)
+    assert first.allow("key")
+    assert second.allow("key")
+    assert not first.allow("key")
+
+
+def test_memory_backend_bounds_the_number_of_keys():
+    backend = MemoryBackend(max_keys=2)
+    limiter = RateLimiter(backend, limit=1, window=60)
+    for key in ("a", "b", "c"):
+        limiter.allow(key)
+    # "a" was evicted, so it starts over.
+    assert limiter.allow("a")
+    assert not limiter.allow("c")
+
+
+def test_login_is_limited_per_email(client):
+    body = {"email": "nobody@example.com", "password": "Wrong0rd!"}
+    statuses = [client.post("/auth/login", json=body).status_code for _ in range(6)]
+
+    assert statuses == [401] * 5 + [429]
+    response = client.post("/auth/login", json=body)
+    assert response.status_code == 429
+    assert "retry-after" in response.headers
+    assert client.post("/auth/login", json={**body, "email": "other@example.com"}).status_code == 401
+
+
+def test_blocking_backend_runs_off_the_event_loop(client, monkeypatch, tmp_path):
+    backend = SQLiteBackend(path=str(tmp_path / "rate_limit.db"))
+    threads = []
+    hit = backend.hit
+
+    def recording_hit(key, window):
+        threads.append(threading.current_thread())
+        return hit(key, window)
+
+    monkeypatch.setattr(backend, "hit", recording_hit)
+    monkeypatch.setattr(rate_limit.ip_limiter, "backend", backend)
+    monkeypatch.setattr(rate_limit.email_limiter, "backend", backend)
+    loop_thread = client.portal.call(threading.current_thread)
+
+    assert client.post("/auth/login", json={"email": "nobody@example.com", "password": "Wrong0rd!"}).status_code == 401
+    assert threads and loop_thread not in threads
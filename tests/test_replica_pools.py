@@ -0,0 +1,32 @@
+'''Replica engines keep their own connection pool stats.'''
+
+from sqlalchemy import text
+from app.db.pool import pool_stats
+from app.db.replicas import ReplicaSet
+
+
+def test_each_replica_records_into_its_own_stats(tmp_path):
+    replicas = ReplicaSet([f"sqlite:///{tmp_path / 'a.db'}", f"sqlite:///{tmp_path / 'b.db'}"])
+    replicas.engines()
+    (_, first, first_stats), (_, second, second_stats) = replicas.pools()
+    primary_checkouts = pool_stats.checkouts
+
+    with first.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    assert first_stats.checkouts == 1 and first_stats.wait_count == 1
+    assert second_stats.checkouts == 0 and second_stats.wait_count == 0
+    assert pool_stats.checkouts == primary_checkouts
+    assert [status["engine"] for status in replicas.status()] == ["replica-0", "replica-1"]
+
+    # dispose() replaces the pool; the new one still records into the replica's stats.
+    first.dispose()
+    with first.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert first_stats.wait_count == 2
+    assert pool_stats.checkouts == primary_checkouts
+
+
+def test_metrics_label_pool_series_by_engine(client):
+    body = client.get("/metrics").text
+    assert 'db_pool_checkouts_total{engine="primary"}' in body
@@ -0,0 +1,70 @@
+'''Logout revokes the token in this worker at once, and in other workers on refresh.'''
+
+from datetime import datetime, timedelta
+from jose import jwt
+from app.core.revocation import TokenRevocationList
+from app.models.user import UserLogins
+
+PASSWORD = "Passw0rd!"
+
+
+def _register_and_login(client, username="alice"):
+    email = f"{username}@example.com"
+    response = client.post("/auth/register", json={"username": username, "email": email, "password": PASSWORD, "role": "user"})
+    assert response.status_code == 200
+    response = client.post("/auth/login", json={"email": email, "password": PASSWORD})
+    assert response.status_code == 200
+    return {"Authorization": "Bearer " + response.json()["access_token"]}
+
+
+def test_login_record_stores_the_token_id_and_expiry(client, db):
+    token = _register_and_login(client)["Authorization"].split(" ")[1]
+    claims = jwt.get_unverified_claims(token)
+
+    record = db.query(UserLogins).one()
+
+    assert record.jti == claims["jti"]
+    assert abs(record.expiration_date - datetime.utcfromtimestamp(claims["exp"])) < timedelta(seconds=1)
+
+
+def test_logged_out_token_is_rejected(client):
+    headers = _register_and_login(client)
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+
+def test_other_workers_pick_up_revocations_on_refresh(client, db):
+    other_worker = TokenRevocationList()
+    assert other_worker.refresh(db) == 0
+
+    headers = _register_and_login(client)
+    client.post("/auth/logout", headers=headers)
+    jti = db.query(UserLogins.jti).filter(UserLogins.status == "suspended").scalar()
+
+    assert not other_worker.is_revoked(jti)
+    assert other_worker.refresh(db) == 1
+    assert other_worker.is_revoked(jti)
+
+
+def test_first_refresh_skips_expired_tokens(db, make_user):
+    user = make_user()
+    now = datetime.utcnow()
+    db.add_all([
+        UserLogins(user_id=user.id, token_digest="a" * 64, jti="live", status="suspended",
+                   expiration_date=now + timedelta(hours=1), revoked_at=now),
+        UserLogins(user_id=user.id, token_digest="b" * 64, jti="expired", status="suspended",
+                   expiration_date=now - timedelta(hours=1), revoked_at=now - timedelta(hours=2)),
+        UserLogins(user_id=user.id, token_digest="c" * 64, jti="active",
+                   expiration_date=now + timedelta(hours=1)),
+    ])
+    db.commit()
+
+    revocations = TokenRevocationList()
+    assert revocations.refresh(db) == 1
+    assert revocations.is_revoked("live")
+    assert not revocations.is_revoked("expired")
+    assert not revocations.is_revoked("active")
+    assert len(revocations) == 1
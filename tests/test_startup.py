@@ -0,0 +1,14 @@
+'''Application startup.'''
+
+from fastapi.testclient import TestClient
+import app.main
+
+
+def test_starts_when_the_revocation_list_cannot_be_loaded(monkeypatch):
+    def unreachable():
+        raise ConnectionError("database unreachable")
+
+    monkeypatch.setattr(app.main, "refresh_revocations", unreachable)
+
+    with TestClient(app.main.app) as client:
+        assert client.get("/metrics").status_code == 200
@@ -0,0 +1,74 @@
+'''Authenticated-user cache: committed writes evict the user, rolled back ones do not.'''
+
+from app.core.user_cache import load_user, user_cache
+from app.db.session import SessionLocal
+from app.db.unit_of_work import UnitOfWork
+from app.models.user import User
+
+
+def _cached(db, user):
+    load_user(db, user.id)
+    assert user_cache.get(user.id) is not None
+
+
+def test_suspension_evicts_the_user_on_commit(db, make_user):
+    user = make_user()
+    _cached(db, user)
+
+    writer = SessionLocal()
+    try:
+        row = writer.get(User, user.id)
+        row.status = "suspended"
+        writer.flush()
+        # Still cached until the suspension is committed.
+        assert user_cache.get(user.id) is not None
+        with UnitOfWork(writer):
+            pass
+    finally:
+        writer.close()
+
+    assert user_cache.get(user.id) is None
+    db.expire_all()
+    assert load_user(db, user.id).status == "suspended"
+
+
+def test_rolled_back_write_keeps_the_entry(db, make_user):
+    user = make_user()
+    _cached(db, user)
+
+    writer = SessionLocal()
+    try:
+        writer.get(User, user.id).role = "admin"
+        writer.flush()
+        writer.rollback()
+        with UnitOfWork(writer):
+            pass
+    finally:
+        writer.close()
+
+    assert user_cache.get(user.id).role == "user"
+
+
+def test_update_evicts_the_user(client, db, auth_headers, make_user):
+    admin, user = make_user("root", role="admin"), make_user()
+    assert client.get("/auth/me", headers=auth_headers(user)).json()[0]["username"] == "alice"
+
+    response = client.put(
+        f"/auth/users/{user.id}",
+        headers=auth_headers(admin),
+        json={"username": "alicia", "email": "alice@example.com", "password": "Passw0rd!", "role": "user"},
+    )
+
+    assert response.status_code == 200
+    assert client.get("/auth/me", headers=auth_headers(user)).json()[0]["username"] == "alicia"
+
+
+def test_delete_evicts_the_user(client, auth_headers, make_user):
+    admin, user = make_user("root", role="admin"), make_user()
+    headers = auth_headers(user)
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    assert client.delete(f"/auth/{user.id}", headers=auth_headers(admin)).status_code == 200
+
+    assert user_cache.get(user.id) is None
+    assert client.get("/auth/me", headers=headers).status_code == 401
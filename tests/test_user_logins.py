@@ -0,0 +1,86 @@
+'''User_Logins: batched purge of expired rows and the token-digest migration.'''
+
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+from app.core.security import token_digest
+from app.db.schema import check_schema, create_schema, migrate_user_logins, missing_columns
+from app.models.user import UserLogins
+from app.repositories.user_repository import UserRepository
+from app.services.maintenance import purge_expired_logins_batch
+
+
+def _login(db, user, expires_in: timedelta, name: str):
+    db.add(UserLogins(user_id=user.id, token_digest=token_digest(name), expiration_date=datetime.utcnow() + expires_in))
+    db.commit()
+
+
+def _remaining(db):
+    db.expire_all()
+    return sorted(login.token_digest for login in db.query(UserLogins))
+
+
+def test_purge_deletes_expired_rows_in_batches(db, make_user):
+    user = make_user()
+    for n in range(5):
+        _login(db, user, timedelta(hours=-1 - n), f"expired-{n}")
+    _login(db, user, timedelta(hours=1), "live")
+
+    assert [purge_expired_logins_batch(2) for _ in range(4)] == [2, 2, 1, 0]
+    assert _remaining(db) == [token_digest("live")]
+
+
+def test_purge_deletes_the_oldest_first(db, make_user):
+    user = make_user()
+    _login(db, user, timedelta(hours=-1), "recent")
+    _login(db, user, timedelta(days=-1), "old")
+
+    assert purge_expired_logins_batch(1) == 1
+    assert _remaining(db) == [token_digest("recent")]
+
+
+@pytest.fixture
+def legacy_logins(database, make_user):
+    '''Replace User_Logins with the table as it was before token digests.'''
+    user = make_user()
+    with database.begin() as conn:
+        conn.execute(text('DROP TABLE "User_Logins"'))
+        conn.execute(text(
+            'CREATE TABLE "User_Logins" (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, '
+            "token VARCHAR(255) NOT NULL, status VARCHAR(9) DEFAULT 'active', "
+            "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, expiration_date TIMESTAMP)"
+        ))
+        conn.execute(text('CREATE UNIQUE INDEX ix_user_logins_token ON "User_Logins" (token)'))
+        conn.execute(
+            text('INSERT INTO "User_Logins" (user_id, token, expiration_date) VALUES (:user_id, :token, :exp)'),
+            [{"user_id": user.id, "token": token, "exp": datetime.utcnow() + timedelta(hours=1)} for token in ("a.b.c", "d.e.f")],
+        )
+    return user
+
+
+def test_schema_check_reports_missing_columns(legacy_logins):
+    assert missing_columns() == {"User_Logins": ["jti", "revoked_at", "token_digest"]}
+    with pytest.raises(RuntimeError, match="Missing columns"):
+        check_schema("fail")
+    with pytest.raises(RuntimeError, match="migrate-logins"):
+        create_schema()
+
+
+def test_migration_backfills_digests_and_drops_the_raw_token(database, db, legacy_logins):
+    assert migrate_user_logins(batch_size=1) == 2
+
+    assert missing_columns() == {}
+    assert "token" not in {column["name"] for column in inspect(database).get_columns("User_Logins")}
+    login = UserRepository(db).get_login_by_token("a.b.c")
+    assert login is not None and login.user_id == legacy_logins.id
+
+    # New logins can be stored, and the digest is unique.
+    _login(db, legacy_logins, timedelta(hours=1), "g.h.i")
+    db.add(UserLogins(user_id=legacy_logins.id, token_digest=token_digest("a.b.c")))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+    assert migrate_user_logins() == 0
+    check_schema("fail")
@@ -0,0 +1,37 @@
+'''POST /watchlist/bulk.'''
+
+from app.services.watchlist import WatchlistService
+
+
+def test_bulk_add_reports_each_movie_id(client, db, auth_headers, make_user, movies):
+    user = make_user()
+    WatchlistService(db).add_to_watchlist(user.id, [1])
+
+    response = client.post("/watchlist/bulk", headers=auth_headers(user), json={"movie_ids": [1, 2, 2, 99, 3]})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "added": 2,
+        "skipped": 3,
+        "results": [
+            {"movie_id": 1, "result": "already_in_watchlist"},
+            {"movie_id": 2, "result": "added"},
+            {"movie_id": 2, "result": "duplicate"},
+            {"movie_id": 99, "result": "not_found"},
+            {"movie_id": 3, "result": "added"},
+        ],
+    }
+    listed = client.get("/watchlist/?sort=movie_id&desc=false", headers=auth_headers(user)).json()
+    assert [item["movie_id"] for item in listed] == [1, 2, 3]
+
+
+def test_bulk_add_sets_the_requested_status(db, make_user, movies):
+    user = make_user()
+    service = WatchlistService(db)
+    service.add_bulk_to_watchlist(user.id, [4, 5], "Watched")
+    assert service.get_summary(user.id) == {"total_movies": 2, "to_watch": 0, "watched": 2}
+
+
+def test_bulk_add_rejects_an_empty_list(client, auth_headers, make_user):
+    response = client.post("/watchlist/bulk", headers=auth_headers(make_user()), json={"movie_ids": []})
+    assert response.status_code == 422
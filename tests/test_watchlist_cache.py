@@ -0,0 +1,65 @@
+'''Watchlist cache backends: a stale load is never stored over an invalidation.'''
+
+import time
+from datetime import datetime
+import pytest
+from app.core.watchlist_cache import MemoryBackend, SQLiteBackend, WatchlistSnapshot
+
+SNAPSHOT = WatchlistSnapshot({1: ("To Watch", datetime(2024, 1, 1, 12, 0))})
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteBackend(path=str(tmp_path / "watchlist_cache.db"))
+    return MemoryBackend()
+
+
+def test_snapshot_round_trip(backend):
+    backend.set(7, SNAPSHOT, time.time())
+    assert backend.get(7) == SNAPSHOT
+    backend.invalidate(7)
+    assert backend.get(7) is None
+
+
+def test_load_started_before_an_invalidation_is_not_stored(backend):
+    loaded_since = time.time()
+    backend.invalidate(7)
+    backend.set(7, SNAPSHOT, loaded_since)
+    assert backend.get(7) is None
+
+
+def test_sqlite_invalidation_reaches_every_worker(tmp_path):
+    path = str(tmp_path / "watchlist_cache.db")
+    worker_a, worker_b = SQLiteBackend(path=path), SQLiteBackend(path=path)
+    worker_b.set(7, SNAPSHOT, time.time())
+
+    worker_a.invalidate(7)
+
+    assert worker_b.get(7) is None
+
+
+def _snapshot(movies: int):
+    return WatchlistSnapshot({movie_id: ("To Watch", None) for movie_id in range(movies)})
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_cache_is_bounded_by_total_entries(kind, tmp_path):
+    if kind == "sqlite":
+        backend = SQLiteBackend(path=str(tmp_path / "watchlist_cache.db"), max_total_entries=25)
+    else:
+        backend = MemoryBackend(max_total_entries=25)
+    for user_id in range(1, 4):
+        backend.set(user_id, _snapshot(10), time.time())
+
+    # The oldest snapshot made room for the third.
+    assert backend.get(1) is None
+    assert backend.get(2) == _snapshot(10) and backend.get(3) == _snapshot(10)
+    assert backend.stats()["entries"] == 20
+
+
+def test_too_large_markers_hold_no_entries():
+    backend = MemoryBackend(max_total_entries=5)
+    for user_id in range(1, 10):
+        backend.set(user_id, WatchlistSnapshot(None), time.time())
+    assert backend.stats()["size"] == 9 and backend.stats()["entries"] == 0
@@ -0,0 +1,42 @@
+'''POST /watchlist/check.'''
+
+from app.core.user_cache import user_cache
+from app.db.pool import pool_stats
+from app.services.watchlist import WatchlistService
+
+
+def test_check_answers_in_request_order(client, db, auth_headers, make_user, movies):
+    user = make_user()
+    WatchlistService(db).add_bulk_to_watchlist(user.id, [2, 5], "Watched")
+
+    response = client.post("/watchlist/check", headers=auth_headers(user), json={"movie_ids": [5, 1, 2]})
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"movie_id": 5, "inWatchlist": True, "status": "Watched"},
+        {"movie_id": 1, "inWatchlist": False, "status": None},
+        {"movie_id": 2, "inWatchlist": True, "status": "Watched"},
+    ]
+
+
+def test_check_sees_a_write_made_after_the_watchlist_was_cached(client, db, auth_headers, make_user, movies):
+    user = make_user()
+    headers = auth_headers(user)
+    assert client.post("/watchlist/check", headers=headers, json={"movie_ids": [3]}).json()[0]["inWatchlist"] is False
+
+    assert client.post("/watchlist/3", headers=headers, json={"movie_id": 3}).status_code == 200
+
+    assert client.post("/watchlist/check", headers=headers, json={"movie_ids": [3]}).json()[0]["inWatchlist"] is True
+
+
+def test_check_uses_one_connection_when_the_user_is_not_cached(client, db, auth_headers, make_user, movies):
+    user = make_user()
+    headers = auth_headers(user)
+    user_cache.clear()
+    before = pool_stats.checkouts
+
+    response = client.post("/watchlist/check", headers=headers, json={"movie_ids": [1]})
+
+    assert response.status_code == 200
+    # The middleware's user lookup and the route share the request's read session.
+    assert pool_stats.checkouts - before == 1
@@ -0,0 +1,113 @@
+'''Per-user Watchlist_Counts: maintained by every write, repaired by reconciliation.'''
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+import app.db.session
+from app.models.watchlist import WatchlistCounts
+from app.repositories.watchlist_repository import WatchlistRepository
+from app.services.maintenance import reconcile_watchlist_counts, reconcile_watchlist_counts_batch
+from app.services.watchlist import WatchlistService
+
+
+def _counters(db, user_id):
+    db.expire_all()
+    row = db.get(WatchlistCounts, user_id)
+    return row and (row.total, row.to_watch, row.watched)
+
+
+def test_writes_keep_counters_in_step(db, make_user, movies):
+    user = make_user()
+    service = WatchlistService(db)
+
+    service.add_to_watchlist(user.id, [1])
+    service.add_bulk_to_watchlist(user.id, [2, 3, 4])
+    assert _counters(db, user.id) == (4, 4, 0)
+
+    service.update_watchlist_status(user.id, 2, "Watched")
+    service.update_watchlist_status(user.id, 2, "Watched")
+    assert _counters(db, user.id) == (4, 3, 1)
+
+    service.delete_from_watchlist(user.id, 2)
+    service.delete_bulk_watchlist(user.id, [3, 99])
+    assert _counters(db, user.id) == (2, 2, 0)
+
+    counts = WatchlistRepository(db).count_by_status(user.id)
+    assert (counts["total"], counts["to_watch"], counts["watched"]) == _counters(db, user.id)
+
+
+def test_summary_reads_the_counters(db, make_user, movies):
+    user = make_user()
+    WatchlistService(db).add_bulk_to_watchlist(user.id, [1, 2, 3])
+    db.get(WatchlistCounts, user.id).watched = 7
+    db.commit()
+
+    assert WatchlistRepository(db).summary(user.id) == {"total_movies": 3, "to_watch": 3, "watched": 7}
+
+
+def test_reconcile_repairs_drifted_and_missing_counters(db, make_user, movies):
+    alice, bob, carol = make_user("alice"), make_user("bob"), make_user("carol")
+    service = WatchlistService(db)
+    service.add_bulk_to_watchlist(alice.id, [1, 2])
+    service.add_bulk_to_watchlist(bob.id, [3], "Watched")
+    service.add_bulk_to_watchlist(carol.id, [4])
+
+    db.get(WatchlistCounts, alice.id).total = 99
+    db.delete(db.get(WatchlistCounts, bob.id))
+    db.commit()
+
+    users, fixed = reconcile_watchlist_counts()
+
+    # Every user is visited; the curator has no counter row yet and gets one.
+    assert users == 4
+    assert fixed == 3
+    assert _counters(db, alice.id) == (2, 2, 0)
+    assert _counters(db, bob.id) == (1, 0, 1)
+    assert _counters(db, carol.id) == (1, 1, 0)
+    assert reconcile_watchlist_counts() == (4, 0)
+
+
+def _snapshot_engine(url):
+    '''SQLite engine whose transactions begin at their first statement, reads
+    included. In WAL mode each transaction then reads from the snapshot taken
+    by its first read, like InnoDB under REPEATABLE READ.'''
+    engine = create_engine(url)
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    return engine
+
+
+def test_reconcile_includes_a_write_committed_after_the_users_were_picked(database, db, make_user, movies, monkeypatch):
+    user = make_user()
+    WatchlistService(db).add_bulk_to_watchlist(user.id, [1, 2])
+    db.get(WatchlistCounts, user.id).total = 99
+    db.commit()
+
+    engine = _snapshot_engine(database.url)
+    monkeypatch.setattr(app.db.session, "SessionLocal", sessionmaker(bind=engine, expire_on_commit=False))
+    interleaved = []
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _write_after_picking_users(conn, cursor, statement, parameters, context, executemany):
+        if not interleaved and statement.lstrip().startswith('SELECT "User".id'):
+            interleaved.append(True)
+            writer = app.db.session.SessionLocal()
+            try:
+                WatchlistService(writer).add_to_watchlist(user.id, [3])
+            finally:
+                writer.close()
+
+    try:
+        reconcile_watchlist_counts_batch()
+    finally:
+        engine.dispose()
+
+    assert interleaved
+    assert _counters(db, user.id) == (3, 3, 0)
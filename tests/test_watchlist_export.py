@@ -0,0 +1,66 @@
+'''GET /watchlist/export as NDJSON and CSV.'''
+
+import csv
+import io
+import json
+from app.services import watchlist as watchlist_service
+from app.services.watchlist import WatchlistService
+
+TITLE = 'Crouching Tiger, "Hidden" Dragon'
+
+
+def _watchlist(db, make_user, movies):
+    user = make_user()
+    movies[1].title = TITLE
+    db.commit()
+    WatchlistService(db).add_bulk_to_watchlist(user.id, [1, 2, 3])
+    return user
+
+
+def test_ndjson_export(client, db, auth_headers, make_user, movies):
+    user = _watchlist(db, make_user, movies)
+
+    response = client.get("/watchlist/export?format=ndjson", headers=auth_headers(user))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["content-disposition"] == 'attachment; filename="watchlist.ndjson"'
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [(r["movie_id"], r["movie_title"], r["status"]) for r in records] == [
+        (3, "Movie 3", "To Watch"), (2, TITLE, "To Watch"), (1, "Movie 1", "To Watch"),
+    ]
+    assert set(records[0]) == {"id", "movie_id", "movie_title", "status", "created_at"}
+
+
+def test_csv_export_quotes_titles(client, db, auth_headers, make_user, movies):
+    user = _watchlist(db, make_user, movies)
+
+    response = client.get("/watchlist/export?format=csv", headers=auth_headers(user))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert '"Crouching Tiger, ""Hidden"" Dragon"' in response.text
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["id", "movie_id", "movie_title", "status", "created_at"]
+    assert [row[1:4] for row in rows[1:]] == [
+        ["3", "Movie 3", "To Watch"], ["2", TITLE, "To Watch"], ["1", "Movie 1", "To Watch"],
+    ]
+
+
+def test_export_is_one_chunk_per_batch(db, make_user, movies, monkeypatch):
+    user = _watchlist(db, make_user, movies)
+    monkeypatch.setattr(watchlist_service, "WATCHLIST_EXPORT_BATCH_SIZE", 2)
+
+    chunks = list(WatchlistService(db).export_watchlist(user.id, "ndjson"))
+
+    assert [chunk.count("\n") for chunk in chunks] == [2, 1]
+
+
+def test_empty_watchlist_exports_only_the_csv_header(client, auth_headers, make_user):
+    response = client.get("/watchlist/export?format=csv", headers=auth_headers(make_user()))
+    assert response.text.splitlines() == ["id,movie_id,movie_title,status,created_at"]
+
+
+def test_unknown_format_is_rejected(client, auth_headers, make_user):
+    response = client.get("/watchlist/export?format=xml", headers=auth_headers(make_user()))
+    assert response.status_code == 422